@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+ASGI plumbing shared by the async food and room recommendation services
+AsyncJSONApp routes JSON requests to async handlers and MicroBatcher
+coalesces concurrent requests into one vectorized call on the model.
+"""
+
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+
+class MicroBatcher:
+    """Coalesces concurrent submissions into one call of a vectorized batch function.
+
+    batch_fn receives the list of submitted items and must return one result
+    per item, in order. It runs on a thread pool so the event loop stays free.
+    Items are coalesced until max_batch_size arrive or max_wait seconds elapse.
+    """
+
+    def __init__(self, batch_fn, executor, max_batch_size=256, max_wait=0.002):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': self.items / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
+
+
+class AsyncJSONApp:
+    """Minimal ASGI application serving JSON routes.
+
+    Subclasses register (method, path) -> handler(data, query) coroutines in
+    self.routes; a handler returns (status, payload). startup() runs on the
+    lifespan startup event, and run_blocking() moves model calls onto the
+    scoring thread pool.
+    """
+
+    def __init__(self, scoring_threads):
+        self.executor = ThreadPoolExecutor(max_workers=scoring_threads)
+        self.routes = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            status, payload = 404, {'error': 'not found'}
+        else:
+            try:
+                data = json.loads(body) if body else {}
+                query = parse_qs(scope.get('query_string', b'').decode())
+                status, payload = await handler(data, query)
+            except Exception as e:
+                status, payload = 500, {'error': str(e)}
+
+        response = json.dumps(payload, default=str).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(response)).encode()),
+                        (b'access-control-allow-origin', b'*')]
+        })
+        await send({'type': 'http.response.body', 'body': response})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        """Load the model before the first request is served"""
+
+    async def run_blocking(self, fn, *args):
+        """Run a blocking call on the scoring thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Request payload parsing shared by the food and room recommendation services
+Every helper raises ValueError with a client-facing message, which the routes
+return as a 400 before any scoring starts.
+"""
+
+
+def is_id(value):
+    """True for a scalar user/item ID (JSON string or integer)"""
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def id_list(value, name):
+    """value as a list of scalar IDs"""
+    if not isinstance(value, list) or not all(is_id(item_id) for item_id in value):
+        raise ValueError(f'{name} must be a list of IDs')
+    return value
+
+
+def positive_int(value, name):
+    """value as an integer of at least 1 (JSON booleans are rejected)"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f'{name} must be a positive integer')
+    return value
+
+
+def parse_batch_pairs(data, item_key):
+    """Read user/item pairs from a batch request, as 'pairs' objects or parallel ID arrays"""
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    if 'pairs' in data:
+        pairs = data.get('pairs') or []
+        if not isinstance(pairs, list) or not all(isinstance(pair, dict) for pair in pairs):
+            raise ValueError(f'pairs must be a list of objects with user_id and {item_key}')
+        user_ids = [pair.get('user_id') for pair in pairs]
+        item_ids = [pair.get(item_key) for pair in pairs]
+    else:
+        user_ids = data.get('user_ids') or []
+        item_ids = data.get(f'{item_key}s') or []
+        if not isinstance(user_ids, list) or not isinstance(item_ids, list):
+            raise ValueError(f'user_ids and {item_key}s must be lists')
+        if len(user_ids) != len(item_ids):
+            raise ValueError(f'user_ids and {item_key}s must have the same length')
+    if not all(is_id(user_id) for user_id in user_ids) or not all(is_id(item_id) for item_id in item_ids):
+        raise ValueError(f'every pair needs a user_id and a {item_key} (string or integer)')
+    return user_ids, item_ids
+
+
+def parse_ratings(ratings, item_key):
+    """{item_id: rating} from {item_id: rating} or [{item_key: ..., 'rating': ...}, ...]; ratings in 1-5"""
+    if isinstance(ratings, list):
+        if not all(isinstance(item, dict) for item in ratings):
+            raise ValueError(f'ratings must be an object or a list of objects with {item_key} and rating')
+        ratings = [(item.get(item_key), item.get('rating')) for item in ratings]
+    elif isinstance(ratings, dict):
+        ratings = list(ratings.items())
+    else:
+        raise ValueError(f'ratings must be an object or a list of objects with {item_key} and rating')
+    if not all(is_id(item_id) for item_id, _ in ratings):
+        raise ValueError(f'every rating needs a {item_key} (string or integer)')
+
+    parsed = {}
+    for item_id, rating in ratings:
+        if isinstance(rating, bool):
+            raise ValueError('ratings must be numeric')
+        try:
+            rating = float(rating)
+        except (TypeError, ValueError):
+            raise ValueError('ratings must be numeric')
+        if not 1.0 <= rating <= 5.0:
+            raise ValueError('ratings must be between 1 and 5')
+        parsed[item_id] = rating
+    return parsed
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared request payload parsing
+
+Run with: python -m pytest test_request_parsing.py
+"""
+
+import unittest
+
+from request_parsing import id_list, parse_batch_pairs, parse_ratings, positive_int
+
+
+class ParseBatchPairsTest(unittest.TestCase):
+
+    def test_pairs_and_parallel_arrays(self):
+        self.assertEqual(parse_batch_pairs({'pairs': [{'user_id': 'u1', 'room_id': 'r1'}]}, 'room_id'),
+                         (['u1'], ['r1']))
+        self.assertEqual(parse_batch_pairs({'user_ids': [1, 2], 'recipe_ids': [3, 4]}, 'recipe_id'),
+                         ([1, 2], [3, 4]))
+
+    def test_malformed_payloads(self):
+        for data in ([1], {'pairs': 'u1'}, {'pairs': [1]}, {'user_ids': 'u1', 'room_ids': ['r1']},
+                     {'user_ids': ['u1'], 'room_ids': []}, {'pairs': [{'user_id': 'u1'}]}):
+            with self.assertRaises(ValueError):
+                parse_batch_pairs(data, 'room_id')
+
+    def test_unhashable_ids(self):
+        for data in ({'pairs': [{'user_id': ['u1'], 'room_id': 'r1'}]},
+                     {'user_ids': ['u1'], 'room_ids': [['r1']]},
+                     {'user_ids': [{'id': 'u1'}], 'room_ids': ['r1']}):
+            with self.assertRaises(ValueError):
+                parse_batch_pairs(data, 'room_id')
+
+
+class FieldTest(unittest.TestCase):
+
+    def test_id_list(self):
+        self.assertEqual(id_list(['r1', 2], 'candidate_rooms'), ['r1', 2])
+        for value in ('r1', [['r1']], [True], [None], {'r1': 1}):
+            with self.assertRaises(ValueError):
+                id_list(value, 'candidate_rooms')
+
+    def test_positive_int(self):
+        self.assertEqual(positive_int(5, 'n_recommendations'), 5)
+        for value in ('5', 0, -1, 2.5, True, None):
+            with self.assertRaises(ValueError):
+                positive_int(value, 'n_recommendations')
+
+
+class ParseRatingsTest(unittest.TestCase):
+
+    def test_object_and_list_forms(self):
+        self.assertEqual(parse_ratings({'r1': 4, 'r2': '5'}, 'room_id'), {'r1': 4.0, 'r2': 5.0})
+        self.assertEqual(parse_ratings([{'recipe_id': 7, 'rating': 3.5}], 'recipe_id'), {7: 3.5})
+
+    def test_malformed_ratings(self):
+        for ratings in ('r1', 4, None, [4], [['r1', 4]], [{'room_id': ['r1'], 'rating': 4}],
+                        [{'rating': 4}], {'r1': 'high'}, {'r1': None}, {'r1': [4]}, {'r1': True}, {'r1': 0}):
+            with self.assertRaises(ValueError):
+                parse_ratings(ratings, 'room_id')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) variant of the food recommendation API
+Serves /predict and /recommendations from an asyncio event loop. Concurrent
+requests that arrive within a short window are micro-batched into one call on
+the model: /predict pairs are scored with a single gathered dot product and
+/recommendations windows with one matrix-matrix product per distinct
+candidate list and N.
+
+Usage: python async_model_service.py   (requires uvicorn)
+"""
+
+import os
+import sys
+from collections import defaultdict
+
+# Set UTF-8 encoding for Windows
+if sys.platform == "win32":
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import model_service as service
+# Shared with the room service; model_service puts ml_common on sys.path
+from asgi_service import AsyncJSONApp, MicroBatcher
+
+# Requests are coalesced until MAX_BATCH_SIZE arrive or MAX_WAIT_MS elapses
+MAX_BATCH_SIZE = int(os.environ.get('MODEL_ASYNC_MAX_BATCH', 256))
+MAX_WAIT_MS = float(os.environ.get('MODEL_ASYNC_MAX_WAIT_MS', 2))
+SCORING_THREADS = int(os.environ.get('MODEL_ASYNC_SCORING_THREADS', 2))
+
+
+def predict_batch(items):
+    """items: (user_id, recipe_id) pairs -> (predicted_rating, confidence) per pair"""
+    model = service.recommendation_model
+    predictions, confidences = model.predict_batch(
+        [user_id for user_id, _ in items], [recipe_id for _, recipe_id in items])
+    return list(zip(predictions.tolist(), confidences))
+
+
+def recommend_batch(items):
+    """items: (user_id, candidate_recipes, n_recommendations) -> recommendation list per item"""
+    model = service.recommendation_model
+    results = [None] * len(items)
+
+    # One matrix-matrix scoring call per distinct (candidate list, N) in the window;
+    # None candidates mean the whole catalogue
+    groups = defaultdict(list)
+    for position, (user_id, candidate_recipes, n_recommendations) in enumerate(items):
+        if candidate_recipes is not None and not candidate_recipes:
+            results[position] = []
+            continue
+        key = None if candidate_recipes is None else tuple(candidate_recipes)
+        groups[key, n_recommendations].append(position)
+    for (candidates, n_recommendations), positions in groups.items():
+        batch = model.get_recommendations_for_users([items[i][0] for i in positions], candidates, n_recommendations)
+        for position, recommendations in zip(positions, batch):
+            results[position] = recommendations
+    return results
+
+
+class AsyncFoodRecommendationApp(AsyncJSONApp):
+    """Minimal ASGI application exposing the food recommendation routes"""
+
+    def __init__(self):
+        super().__init__(SCORING_THREADS)
+        self.predict_batcher = MicroBatcher(predict_batch, self.executor, MAX_BATCH_SIZE, MAX_WAIT_MS / 1000.0)
+        self.recommend_batcher = MicroBatcher(recommend_batch, self.executor, MAX_BATCH_SIZE, MAX_WAIT_MS / 1000.0)
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('POST', '/predict'): self.predict,
+            ('POST', '/recommendations'): self.recommendations
+        }
+
+    async def startup(self):
+        if await self.run_blocking(service.recommendation_model.load_model):
+            print("Model loaded successfully on startup")
+        else:
+            print("Model not loaded on startup - will try again on first request")
+        await self.run_blocking(service.get_interaction_store)
+
+    async def health(self, data, query):
+        model = service.recommendation_model
+        return 200, {
+            'status': 'healthy',
+            'mode': 'async',
+            'model_loaded': model.is_loaded,
+            'model_version': model.model_version,
+            'predict_batching': self.predict_batcher.stats(),
+            'recommendation_batching': self.recommend_batcher.stats()
+        }
+
+    async def predict(self, data, query):
+        user_id = data.get('user_id')
+        recipe_id = data.get('recipe_id')
+        if not user_id or not recipe_id:
+            return 400, {'error': 'user_id and recipe_id required'}
+
+        prediction, confidence = await self.predict_batcher.submit((user_id, recipe_id))
+        return 200, {
+            'success': True,
+            'user_id': user_id,
+            'recipe_id': recipe_id,
+            'predicted_rating': prediction,
+            'confidence': confidence
+        }
+
+    async def recommendations(self, data, query):
+        # Candidate lists key the scoring groups, so they must be lists of scalar IDs
+        try:
+            user_id, candidate_recipes, n_recommendations = service.parse_recommendation_request(data)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        recommendations = await self.recommend_batcher.submit((user_id, candidate_recipes, n_recommendations))
+        return 200, {
+            'success': True,
+            'user_id': user_id,
+            'recommendations': recommendations,
+            'total_candidates': (service.recommendation_model.catalogue_size()
+                                 if candidate_recipes is None else len(candidate_recipes)),
+            'returned_count': len(recommendations)
+        }
+
+
+app = AsyncFoodRecommendationApp()
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required for the async service: pip install uvicorn")
+        sys.exit(1)
+
+    print("Starting async Food Recommendation Model Service on port 5001...")
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('MODEL_SERVICE_PORT', 5001)), log_level='warning')
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Convert the pickled food recommendation model into the memory-mapped artifact format
+Usage: python convert_food_model.py [food_model_artifact]
+"""
+
+import sys
+import os
+
+# Set UTF-8 encoding for Windows
+if sys.platform == "win32":
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Change to script directory
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+from model_service import FoodRecommendationModel
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else 'food_model_artifact'
+
+    # Always convert from the pickles, even if an artifact already exists
+    model = FoodRecommendationModel()
+    if not model.load_model(use_artifact=False) or model.user_factors is None:
+        print("Could not load food model factors from complete_food_recommendation_model.pkl")
+        sys.exit(1)
+
+    model.save_artifact(target)
+    print(f"Food model artifact written to {target}")
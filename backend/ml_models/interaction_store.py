@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Append-only interaction log for the food recommendation service
+Replaces the whole-file user_history.json rewrites with time-bucketed JSON
+lines segments, a per-user offset index and segment-level expiry.
+
+Usage: python interaction_store.py [store_dir] (import|expire|stats)
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+from collections import defaultdict
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: served by a single process, so no cross-process lock is needed
+    fcntl = None
+
+SEGMENT_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx.json'
+# Written once user_history.json has been considered for import, and the lock serialising that step
+LEGACY_IMPORT_MARKER = 'legacy_import.json'
+LEGACY_IMPORT_LOCK = 'legacy_import.lock'
+
+
+class _Segment:
+    """In-memory view of one segment file: byte size indexed so far and per-user record offsets"""
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.size = 0
+        self.min_ts = None
+        self.max_ts = None
+        self.users = defaultdict(list)  # user_id -> [(offset, length, ts), ...]
+        self.records = 0
+
+    def add(self, user_id, offset, length, ts):
+        self.users[user_id].append((offset, length, ts))
+        self.records += 1
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+
+
+class InteractionStore:
+    """Append-only, segment-based store of user interactions.
+
+    Each record is one JSON line appended to the newest segment file
+    (<seq>.jsonl). A segment is rolled once it reaches segment_max_bytes or
+    spans segment_max_age seconds, and sealed with a <seq>.idx.json snapshot
+    of its per-user offsets. Appends and per-user reads therefore cost I/O
+    proportional to the records involved, not to the size of the log.
+
+    Expiry is by whole segment: a segment is deleted once its newest record
+    is older than the retention window, and reads filter out the expired
+    records that remain in the oldest live segment. Several processes may
+    append to the same directory; each keeps its index current by scanning
+    only the bytes added since its last look.
+    """
+
+    def __init__(self, directory, retention_days=30, segment_max_bytes=64 * 1024 * 1024, segment_max_age=86400):
+        self.directory = directory
+        self.retention = retention_days * 86400
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self._segments = {}
+        self._lock = threading.Lock()
+        self._expiry_thread = None
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+
+    def _path(self, seq, suffix=SEGMENT_SUFFIX):
+        return os.path.join(self.directory, f"{seq:010d}{suffix}")
+
+    def _segment_seqs(self):
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit())
+
+    def refresh(self):
+        """Bring the in-memory index up to date with the segment files on disk"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        seqs = self._segment_seqs()
+        # Segments expired by this or another process
+        for seq in set(self._segments) - set(seqs):
+            del self._segments[seq]
+
+        for seq in seqs:
+            segment = self._segments.get(seq)
+            if segment is None:
+                segment = self._load_sealed_index(seq) or _Segment(seq)
+                self._segments[seq] = segment
+            try:
+                size = os.path.getsize(self._path(seq))
+            except FileNotFoundError:
+                self._segments.pop(seq, None)
+                continue
+            if size > segment.size:
+                self._scan(segment, size)
+
+    def _load_sealed_index(self, seq):
+        try:
+            with open(self._path(seq, INDEX_SUFFIX), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        segment = _Segment(seq)
+        for user_id, entries in snapshot['users'].items():
+            for offset, length, ts in entries:
+                segment.add(user_id, offset, length, ts)
+        segment.size = snapshot['size']
+        return segment
+
+    def _scan(self, segment, end):
+        """Index the complete lines between segment.size and end"""
+        with open(self._path(segment.seq), 'rb') as f:
+            f.seek(segment.size)
+            data = f.read(end - segment.size)
+
+        offset = segment.size
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break  # a write still in progress; picked up on the next refresh
+            try:
+                record = json.loads(line)
+                segment.add(str(record['user_id']), offset, len(line), float(record['ts']))
+            except (ValueError, KeyError, TypeError):
+                pass  # skip a corrupt line rather than losing the segment
+            offset += len(line)
+        segment.size = offset
+
+    def _seal(self, segment):
+        """Write the per-user offset snapshot of a segment that no longer receives appends"""
+        tmp_path = self._path(segment.seq, f"{INDEX_SUFFIX}.tmp-{os.getpid()}")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'size': segment.size, 'users': segment.users}, f, separators=(',', ':'))
+        os.replace(tmp_path, self._path(segment.seq, INDEX_SUFFIX))
+
+    def _writable_segment(self, ts):
+        """Return the sequence number to append to, rolling the newest segment when it is full or old"""
+        if not self._segments:
+            return 1
+        seq = max(self._segments)
+        segment = self._segments[seq]
+        too_big = segment.size >= self.segment_max_bytes
+        too_old = segment.min_ts is not None and ts - segment.min_ts >= self.segment_max_age
+        if too_big or too_old:
+            self._seal(segment)
+            return seq + 1
+        return seq
+
+    def append(self, user_id, recipe_id, rating=None, interaction_type='rating', timestamp=None):
+        """Append one interaction; returns the stored record"""
+        ts = time.time() if timestamp is None else float(timestamp)
+        moment = datetime.fromtimestamp(ts)
+        record = {
+            'user_id': str(user_id),
+            'recipe_id': recipe_id,
+            'rating': rating,
+            'interaction_type': interaction_type,
+            'timestamp': moment.isoformat(),
+            'date': moment.date().isoformat(),
+            'ts': ts
+        }
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+        with self._lock:
+            self._refresh()
+            seq = self._writable_segment(ts)
+            # O_APPEND makes each single write land whole at the end of the file
+            fd = os.open(self._path(seq), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self._refresh()
+
+        return record
+
+    def history(self, user_id, since=None):
+        """Return a user's live interactions, oldest first, reading only that user's records"""
+        cutoff = self._cutoff(since)
+        user_id = str(user_id)
+
+        with self._lock:
+            self._refresh()
+            locations = [(segment.seq, entries) for segment in sorted(self._segments.values(), key=lambda s: s.seq)
+                         if segment.max_ts is not None and segment.max_ts >= cutoff
+                         and (entries := [e for e in segment.users.get(user_id, ()) if e[2] >= cutoff])]
+
+        records = []
+        for seq, entries in locations:
+            try:
+                with open(self._path(seq), 'rb') as f:
+                    for offset, length, _ in entries:
+                        f.seek(offset)
+                        records.append(json.loads(f.read(length)))
+            except FileNotFoundError:
+                continue  # expired while we were reading
+        records.sort(key=lambda record: record['ts'])
+        return records
+
+    def iter_records(self, since=None):
+        """Stream every live interaction, segment by segment, without loading the log into memory"""
+        cutoff = self._cutoff(since)
+        with self._lock:
+            self._refresh()
+            seqs = [seq for seq, segment in sorted(self._segments.items())
+                    if segment.max_ts is not None and segment.max_ts >= cutoff]
+
+        for seq in seqs:
+            try:
+                with open(self._path(seq), 'rb') as f:
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if record.get('ts', 0) >= cutoff:
+                            yield record
+            except FileNotFoundError:
+                continue
+
+    def end_position(self):
+        """Position just past the last complete record, for use with iter_after"""
+        with self._lock:
+            self._refresh()
+            if not self._segments:
+                return None
+            seq = max(self._segments)
+            return seq, self._segments[seq].size
+
+    def iter_after(self, position):
+        """Stream (record, position) for complete records appended after position.
+
+        position is a (segment seq, byte offset) pair as returned with each
+        record, or None for the start of the log. Consumers that remember the
+        last position only ever read bytes they have not seen.
+        """
+        seq, offset = position or (0, 0)
+        with self._lock:
+            self._refresh()
+            pending = [(s, segment.size) for s, segment in sorted(self._segments.items()) if s >= seq]
+
+        for s, size in pending:
+            start = offset if s == seq else 0
+            if size <= start:
+                continue
+            try:
+                with open(self._path(s), 'rb') as f:
+                    f.seek(start)
+                    data = f.read(size - start)
+            except FileNotFoundError:
+                continue
+            end = start
+            for line in data.splitlines(keepends=True):
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield record, (s, end)
+
+    def expire(self, now=None):
+        """Delete segments whose newest record is past the retention window"""
+        cutoff = (time.time() if now is None else now) - self.retention
+        removed, removed_bytes = 0, 0
+        with self._lock:
+            self._refresh()
+            newest = max(self._segments) if self._segments else None
+            for seq, segment in sorted(self._segments.items()):
+                if seq == newest or segment.max_ts is None or segment.max_ts >= cutoff:
+                    continue
+                removed_bytes += segment.size
+                for suffix in (SEGMENT_SUFFIX, INDEX_SUFFIX):
+                    try:
+                        os.remove(self._path(seq, suffix))
+                    except FileNotFoundError:
+                        pass
+                del self._segments[seq]
+                removed += 1
+        return {'removed_segments': removed, 'removed_bytes': removed_bytes, 'cutoff': cutoff}
+
+    def start_expiry(self, interval):
+        """Run expire() every interval seconds on a daemon thread"""
+        if self._expiry_thread is not None or interval <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    result = self.expire()
+                    if result['removed_segments']:
+                        print(f"Interaction log: expired {result['removed_segments']} segments "
+                              f"({result['removed_bytes']} bytes)")
+                except Exception as e:
+                    print(f"Interaction log expiry error: {e}")
+
+        self._expiry_thread = threading.Thread(target=run, daemon=True)
+        self._expiry_thread.start()
+
+    def import_legacy_history(self, path):
+        """Append the records of a user_history.json document; returns the number imported"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+
+        cutoff = self._cutoff(None)
+        imported = 0
+        for user_id, interactions in history.items():
+            for interaction in interactions:
+                try:
+                    ts = datetime.fromisoformat(interaction['timestamp']).timestamp()
+                except (KeyError, ValueError):
+                    continue
+                if ts < cutoff:
+                    continue
+                self.append(user_id, interaction.get('recipe_id'), interaction.get('rating'),
+                            interaction.get('interaction_type', 'rating'), timestamp=ts)
+                imported += 1
+        return imported
+
+    def import_legacy_history_once(self, path):
+        """Import user_history.json into a new log once across all processes; returns the number imported.
+
+        An exclusive lock file serialises concurrent callers (pre-forked
+        workers starting together) and a marker written atomically afterwards
+        records the decision, so the history is never appended twice - not
+        even after expiry has emptied the log again.
+        """
+        marker = os.path.join(self.directory, LEGACY_IMPORT_MARKER)
+        with self._exclusive_lock(LEGACY_IMPORT_LOCK):
+            if os.path.exists(marker):
+                return 0
+            imported = self.import_legacy_history(path) if self.is_empty() else 0
+
+            tmp_path = f"{marker}.tmp-{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'source': path, 'imported': imported, 'at': datetime.now().isoformat()}, f)
+            os.replace(tmp_path, marker)
+        return imported
+
+    @contextlib.contextmanager
+    def _exclusive_lock(self, name):
+        """Hold an exclusive advisory lock on a file in the store directory"""
+        with open(os.path.join(self.directory, name), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def is_empty(self):
+        with self._lock:
+            self._refresh()
+            return not any(segment.records for segment in self._segments.values())
+
+    def _cutoff(self, since):
+        cutoff = time.time() - self.retention
+        return cutoff if since is None else max(cutoff, float(since))
+
+    def stats(self):
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments.values())
+        users = set()
+        for segment in segments:
+            users.update(segment.users)
+        return {
+            'segments': len(segments),
+            'records': sum(segment.records for segment in segments),
+            'bytes': sum(segment.size for segment in segments),
+            'users': len(users),
+            'retention_days': self.retention / 86400,
+            'oldest': min((s.min_ts for s in segments if s.min_ts is not None), default=None),
+            'newest': max((s.max_ts for s in segments if s.max_ts is not None), default=None)
+        }
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    store_dir = sys.argv[1] if len(sys.argv) > 2 else os.path.join(base_dir, 'interaction_log')
+    command = sys.argv[-1] if len(sys.argv) > 1 else 'stats'
+
+    store = InteractionStore(store_dir)
+    if command == 'import':
+        count = store.import_legacy_history(os.path.join(base_dir, 'user_history.json'))
+        print(f"Imported {count} interactions into {store_dir}")
+    elif command == 'expire':
+        print(json.dumps(store.expire(), indent=2))
+    else:
+        print(json.dumps(store.stats(), indent=2))
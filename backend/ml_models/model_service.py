@@ -36,28 +36,114 @@ except Exception as e:
     print(f"⚠️ Dependency check failed: {e}")
 
 # Now import required modules
+import json
+import time
+import shutil
 import pickle
+import threading
 import numpy as np
 import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from interaction_store import InteractionStore
+from profile_aggregator import ProfileAggregator
+
+# Request parsing shared with the room service
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml_common'))
+from request_parsing import id_list, is_id, parse_batch_pairs, parse_ratings, positive_int
 
 app = Flask(__name__)
 CORS(app)
 
+# Upper bound on user-recipe pairs scored by a single /predict/batch call
+MAX_BATCH_PAIRS = 50000
+
+# Users scored per matrix-matrix product in bulk recommendations, and the most per request
+BULK_BLOCK_SIZE = 1024
+MAX_BULK_USERS = 100000
+
+# Version tag written to the manifest of memory-mapped model artifacts
+ARTIFACT_FORMAT = 'food-model-artifact/1'
+# Version tag of precomputed top-K directories (ml_tools/precompute_recommendations.py)
+TOPK_FORMAT = 'topk-recommendations/1'
+
+# Ridge term and capacity for users folded in online (see fold_in_user)
+FOLD_IN_REGULARIZATION = float(os.environ.get('FOOD_FOLD_IN_REGULARIZATION', 0.1))
+FOLD_IN_MAX_USERS = int(os.environ.get('FOOD_FOLD_IN_MAX_USERS', 100000))
+
+# Profiles pick up records written by other workers at most this many seconds late
+PROFILE_REFRESH_SECONDS = 5
+# Pseudo-count of global-mean ratings a profile's average is shrunk towards
+PROFILE_PRIOR_WEIGHT = 3.0
+# Decayed profile strength at which a folded-in user earns 'medium' confidence
+MEDIUM_PROFILE_STRENGTH = 0.5
+# Rating points separating the most and least interacted-with recipes in cold-start scores
+POPULARITY_WEIGHT = 0.25
+
+class PrecomputedTopK:
+    """Per-user top-K recommendations written offline, memory-mapped read-only.
+
+    items holds catalogue positions (-1 pads users with fewer than k) and
+    scores the matching predicted ratings, one row per model user.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != TOPK_FORMAT:
+            raise ValueError(f"Unsupported top-K format: {self.manifest.get('format')}")
+        self.k = self.manifest['k']
+        self.items = np.load(os.path.join(path, 'items.npy'), mmap_mode='r')
+        self.scores = np.load(os.path.join(path, 'scores.npy'), mmap_mode='r')
+
+    def get(self, row, n):
+        """(item positions, scores) of a user's first n precomputed recommendations"""
+        items = np.asarray(self.items[row, :n])
+        valid = items >= 0
+        return items[valid], np.asarray(self.scores[row, :n])[valid]
+
 class FoodRecommendationModel:
-    def __init__(self):
+    def __init__(self, artifact_dir=None, model_dir=None, profiles=None, topk_path=None):
+        # Directory holding the .pkl files (defaults to this script's directory)
+        self.model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
+        # Incrementally aggregated user profiles (ProfileAggregator), if any
+        self.profiles = profiles
+        # Offline top-K directory served for whole-catalogue requests, if any
+        self.topk_path = topk_path
+        self.precomputed = None
+        self._catalogue = None
+        # Pickle-free artifact directory; preferred over the .pkl files when present
+        self.artifact_dir = artifact_dir or os.path.join(self.model_dir, 'food_model_artifact')
+        self.model_version = 0
         self.model = None
         self.user_mappings = None
         self.recipe_mappings = None
         self.global_mean = 4.66
         self.is_loaded = False
+
+        # Dense SVD factors exported from the model at load time
+        self.user_factors = None
+        self.recipe_factors = None
+        self.user_bias = None
+        self.recipe_bias = None
+        self.baseline = 0.0
+        # Users folded in since load: str(user_id) -> (factor vector, bias, ratings)
+        self.folded_users = {}
+        self.fold_in_observed_only = True
+        self.recipe_gram = None
+        self._fold_in_lock = threading.Lock()
+        # Cold-start scoring: per-recipe offsets and the cached (log position, built at, scores)
+        self.recipe_offsets = None
+        self._cold_start = None
         
-    def load_model(self):
+    def load_model(self, use_artifact=True):
         """Load the actual trained SVD model"""
         try:
-            model_path = os.path.join(os.path.dirname(__file__), 'complete_food_recommendation_model.pkl')
-            mappings_path = os.path.join(os.path.dirname(__file__), 'recommendation_mappings.pkl')
+            if use_artifact and os.path.isdir(self.artifact_dir):
+                return self._load_artifact(self.artifact_dir)
+
+            model_path = os.path.join(self.model_dir, 'complete_food_recommendation_model.pkl')
+            mappings_path = os.path.join(self.model_dir, 'recommendation_mappings.pkl')
 
             print(f"Loading model from: {model_path}")
             print(f"Loading mappings from: {mappings_path}")
@@ -81,11 +167,14 @@ class FoodRecommendationModel:
                     self.model = model_data
                     print("Model loaded (direct object)")
 
+                self._export_factors(model_data)
+
             except Exception as model_error:
                 print(f"Model loading error: {model_error}")
                 print("Using fallback model configuration...")
                 self.model = None
                 self.global_mean = 4.66
+                self._export_factors(None)
 
             # Try to load mappings
             if os.path.exists(mappings_path):
@@ -109,6 +198,7 @@ class FoodRecommendationModel:
                 self.recipe_mappings = {}
 
             self.is_loaded = True
+            self._open_precomputed()
             print("Food recommendation model service ready!")
             return True
 
@@ -123,24 +213,26 @@ class FoodRecommendationModel:
             return self.global_mean
 
         try:
-            # If we have mappings, try to use them
-            if self.user_mappings and self.recipe_mappings:
-                user_idx = self.user_mappings.get(str(user_id))
-                recipe_idx = self.recipe_mappings.get(str(recipe_id))
-
-                if user_idx is not None and recipe_idx is not None and self.model:
-                    try:
-                        # Try to get prediction from real model
-                        prediction = self.model.predict(user_idx, recipe_idx)
-                        return max(1.0, min(5.0, float(prediction)))
-                    except:
-                        pass
-
-            # Fallback: generate realistic prediction based on global mean with some variation
-            import random
-            base_rating = self.global_mean
-            variation = random.uniform(-0.5, 0.5)
-            predicted_rating = base_rating + variation
+            user = self._user_vector(user_id)
+            recipe_idx = self._recipe_index(recipe_id)
+
+            if user is not None and recipe_idx is not None:
+                # Prediction from the exported SVD factors
+                user_vector, user_bias = user
+                prediction = (
+                    self.baseline + user_bias + self.recipe_bias[recipe_idx]
+                    + float(user_vector @ self.recipe_factors[recipe_idx])
+                )
+                return max(1.0, min(5.0, float(prediction)))
+
+            # Models without exported factors predict the pair themselves
+            predicted = self._per_pair_predictions([user_id], [recipe_id])[0]
+            if not np.isnan(predicted):
+                return max(1.0, min(5.0, float(predicted)))
+
+            # Fallback: deterministic cold-start score from the profile mean and recipe prior
+            cold_start = self._cold_start_scores()
+            predicted_rating = self._profile_prior(user_id) + float(cold_start[-1 if recipe_idx is None else recipe_idx])
 
             return max(1.0, min(5.0, predicted_rating))
 
@@ -148,42 +240,644 @@ class FoodRecommendationModel:
             print(f"Prediction error: {str(e)}")
             return self.global_mean
     
-    def get_user_recommendations(self, user_id, candidate_recipes, n_recommendations=10):
-        """Get top N recommendations for a user"""
+    def save_artifact(self, artifact_dir):
+        """Write the exported factors as a pickle-free, memory-mappable artifact directory"""
+        if self.user_factors is None:
+            raise RuntimeError('model factors must be loaded before they can be exported')
+
+        tmp_dir = f"{artifact_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, 'user_factors.npy'), self.user_factors)
+        np.save(os.path.join(tmp_dir, 'recipe_factors.npy'), self.recipe_factors)
+        np.save(os.path.join(tmp_dir, 'user_bias.npy'), self.user_bias)
+        np.save(os.path.join(tmp_dir, 'recipe_bias.npy'), self.recipe_bias)
+        np.save(os.path.join(tmp_dir, 'recipe_offsets.npy'), self.recipe_offsets)
+
+        with open(os.path.join(tmp_dir, 'mappings.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'user_mappings': {str(k): int(v) for k, v in self.user_mappings.items()},
+                'recipe_mappings': {str(k): int(v) for k, v in self.recipe_mappings.items()}
+            }, f)
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': ARTIFACT_FORMAT,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'global_mean': float(self.global_mean),
+                'baseline': float(self.baseline),
+                'biased': self.fold_in_observed_only,
+                'n_users': int(self.user_factors.shape[0]),
+                'n_recipes': int(self.recipe_factors.shape[0]),
+                'n_components': int(self.user_factors.shape[1])
+            }, f)
+
+        if os.path.isdir(artifact_dir):
+            shutil.rmtree(artifact_dir)
+        os.replace(tmp_dir, artifact_dir)
+        print(f"Model artifact written to {artifact_dir}")
+
+    def _load_artifact(self, artifact_dir):
+        """Open a pickle-free artifact directory with memory-mapped factor arrays"""
+        print(f"Loading model artifact from: {artifact_dir}")
+        with open(os.path.join(artifact_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format: {manifest.get('format')}")
+
+        with open(os.path.join(artifact_dir, 'mappings.json'), 'r', encoding='utf-8') as f:
+            mappings = json.load(f)
+
+        def open_array(name):
+            return np.load(os.path.join(artifact_dir, name), mmap_mode='r')
+
+        self.model = None
+        self.global_mean = manifest['global_mean']
+        self.baseline = manifest['baseline']
+        self.user_factors = open_array('user_factors.npy')
+        self.recipe_factors = open_array('recipe_factors.npy')
+        self.user_bias = open_array('user_bias.npy')
+        self.recipe_bias = open_array('recipe_bias.npy')
+        self.user_mappings = mappings['user_mappings']
+        self.recipe_mappings = mappings['recipe_mappings']
+        if 'biased' in manifest:
+            biased = manifest['biased']
+        else:
+            biased = bool(np.any(self.user_bias) or np.any(self.recipe_bias))
+        self._prepare_fold_in(biased)
+        # Older artifacts lack the offsets; they are then computed from the user factors once
+        offsets_path = os.path.join(artifact_dir, 'recipe_offsets.npy')
+        self._prepare_cold_start(np.load(offsets_path) if os.path.exists(offsets_path) else None)
+
+        self.is_loaded = True
+        self._open_precomputed()
+        print(f"Artifact loaded: {len(self.user_mappings)} users, {len(self.recipe_mappings)} recipes")
+        print("Food recommendation model service ready!")
+        return True
+
+    def _export_factors(self, model_data):
+        """Pull user/recipe factor matrices and biases out of the loaded model.
+
+        Supports Surprise-style SVD objects (pu, qi, bu, bi), dictionaries holding
+        the factor arrays, and scikit-learn TruncatedSVD (components_) paired with
+        exported user factors. Arrays are stored as contiguous float32 so that all
+        scoring paths are plain array math.
+        """
+        self.user_factors = self.recipe_factors = None
+        self.user_bias = self.recipe_bias = None
+        self.baseline = 0.0
+        self._prepare_cold_start()
+        if model_data is None:
+            return
+
+        sources = [self.model]
+        if isinstance(model_data, dict):
+            sources.append(model_data)
+
+        def lookup(*names):
+            for source in sources:
+                for name in names:
+                    value = source.get(name) if isinstance(source, dict) else getattr(source, name, None)
+                    if value is not None:
+                        return value
+            return None
+
+        user_factors = lookup('pu', 'user_factors')
+        recipe_factors = lookup('qi', 'recipe_factors', 'item_factors')
+        if recipe_factors is None and lookup('components_') is not None:
+            # TruncatedSVD stores item factors as components (n_components x n_items)
+            recipe_factors = np.asarray(lookup('components_')).T
+
+        if user_factors is None or recipe_factors is None:
+            if self._predicts_per_pair():
+                print("Model does not expose SVD factors - scoring pairs with model.predict")
+            else:
+                print("Model does not expose SVD factors - using fallback predictions")
+            return
+
+        user_factors = np.ascontiguousarray(user_factors, dtype=np.float32)
+        recipe_factors = np.ascontiguousarray(recipe_factors, dtype=np.float32)
+        if user_factors.ndim != 2 or recipe_factors.ndim != 2 or user_factors.shape[1] != recipe_factors.shape[1]:
+            print(f"Incompatible factor shapes {user_factors.shape} and {recipe_factors.shape} - using fallback predictions")
+            return
+
+        user_bias = lookup('bu', 'user_bias')
+        recipe_bias = lookup('bi', 'recipe_bias', 'item_bias')
+        # Biased SVD predicts offsets from the global mean; plain TruncatedSVD
+        # reconstructs ratings directly unless it was trained on centered data
+        centered = lookup('mean_centered')
+        self.baseline = self.global_mean if (user_bias is not None or recipe_bias is not None or centered) else 0.0
+        self.user_factors = user_factors
+        self.recipe_factors = recipe_factors
+        self.user_bias = (np.zeros(len(user_factors), dtype=np.float32) if user_bias is None
+                          else np.ascontiguousarray(user_bias, dtype=np.float32))
+        self.recipe_bias = (np.zeros(len(recipe_factors), dtype=np.float32) if recipe_bias is None
+                            else np.ascontiguousarray(recipe_bias, dtype=np.float32))
+        self._prepare_fold_in(user_bias is not None or recipe_bias is not None)
+        self._prepare_cold_start()
+        print(f"SVD factors exported: {user_factors.shape[0]} users x {recipe_factors.shape[0]} recipes, "
+              f"{user_factors.shape[1]} components")
+
+    def _prepare_fold_in(self, biased):
+        """Choose the fold-in objective that matches how the factors were trained.
+
+        Biased (Surprise-style) SVD is fitted on observed ratings only, so new
+        users are solved against the rated recipes alone. TruncatedSVD is fitted
+        on the full matrix with unrated cells at the baseline, so its least-squares
+        fit also spans every recipe and uses the Gram matrix of all recipe factors.
+        """
+        self.folded_users = {}
+        self.fold_in_observed_only = bool(biased)
+        self.recipe_gram = None
+        if not self.fold_in_observed_only:
+            recipe_factors = np.asarray(self.recipe_factors, dtype=np.float64)
+            self.recipe_gram = recipe_factors.T @ recipe_factors
+
+    def _prepare_cold_start(self, recipe_offsets=None):
+        """Precompute each recipe's rating offset for pairs the factors cannot score.
+
+        The offset is the recipe's predicted rating for the average trained
+        user (its bias plus the mean user vector projected onto its factors),
+        centred across recipes so it shifts a user's profile mean either way.
+        Artifacts store the offsets, so opening one never reads the
+        memory-mapped user factors.
+        """
+        self.recipe_offsets = None
+        self._cold_start = None
+        self._catalogue = None
+        if self.recipe_factors is None:
+            return
+        if recipe_offsets is None:
+            mean_user = self.user_factors.mean(axis=0, dtype=np.float64)
+            offsets = self.recipe_bias.astype(np.float64) + self.recipe_factors @ mean_user
+            recipe_offsets = offsets - offsets.mean()
+        self.recipe_offsets = np.asarray(recipe_offsets, dtype=np.float32)
+
+    def _cold_start_scores(self):
+        """Per-recipe cold-start offsets plus popularity, with a trailing 0 slot for unknown recipes (index -1).
+
+        Popularity is the log of each recipe's interaction count in the log,
+        so the array is rebuilt only after new interactions have been read,
+        and at most every PROFILE_REFRESH_SECONDS.
+        """
+        if self.recipe_offsets is None:
+            return np.zeros(1, dtype=np.float32)
+
+        position = self.profiles.position if self.profiles is not None else None
+        cached = self._cold_start
+        if cached is not None and (cached[0] == position or time.time() - cached[1] < PROFILE_REFRESH_SECONDS):
+            return cached[2]
+
+        popularity = np.zeros(len(self.recipe_offsets), dtype=np.float64)
+        counts = self.profiles.recipe_counts() if self.profiles is not None else {}
+        if counts:
+            recipe_idx = self._resolve_recipe_indices(list(counts))
+            known = recipe_idx >= 0
+            popularity[recipe_idx[known]] = np.log1p(np.fromiter(counts.values(), dtype=np.float64, count=len(counts))[known])
+            if popularity.max() > 0:
+                popularity /= popularity.max()
+                popularity -= popularity.mean()
+
+        scores = np.zeros(len(self.recipe_offsets) + 1, dtype=np.float32)
+        scores[:-1] = self.recipe_offsets + POPULARITY_WEIGHT * popularity
+        self._cold_start = (position, time.time(), scores)
+        return scores
+
+    def fold_in_user(self, user_id, ratings):
+        """Compute a factor vector for a new or active user from recipe ratings, without retraining.
+
+        ratings maps recipe_id -> rating and is merged with anything folded in
+        for the user before. Returns a summary dict; recipes missing from the
+        model are ignored. Raises ValueError when no rated recipe is in the
+        model, so the user stays on cold-start scoring instead of a zero vector.
+        """
+        if self.recipe_factors is None:
+            raise RuntimeError('model factors not loaded')
+
+        user_key = str(user_id)
+        folded = self.folded_users.get(user_key)
+        merged = dict(folded[2]) if folded is not None else {}
+        ignored = []
+        for recipe_id, rating in ratings.items():
+            if self._recipe_index(recipe_id) is None:
+                ignored.append(recipe_id)
+            else:
+                merged[str(recipe_id)] = float(rating)
+        if not merged:
+            raise ValueError('none of the rated recipes are in the model')
+
+        recipe_idx = np.array([self.recipe_mappings[recipe_id] for recipe_id in merged], dtype=np.int64)
+        targets = np.array(list(merged.values()), dtype=np.float64) - self.baseline
+        factors = np.asarray(self.recipe_factors[recipe_idx], dtype=np.float64)
+        n_factors = self.recipe_factors.shape[1]
+
+        if self.fold_in_observed_only:
+            # Solve for [user factors, user bias] over the rated recipes only
+            design = np.hstack([factors, np.ones((len(recipe_idx), 1))])
+            targets = targets - self.recipe_bias[recipe_idx]
+            solution = np.linalg.solve(
+                design.T @ design + FOLD_IN_REGULARIZATION * np.eye(n_factors + 1), design.T @ targets)
+            vector, bias = solution[:n_factors], float(solution[n_factors])
+        else:
+            vector = np.linalg.solve(
+                self.recipe_gram + FOLD_IN_REGULARIZATION * np.eye(n_factors), factors.T @ targets)
+            bias = 0.0
+
+        with self._fold_in_lock:
+            self.folded_users.pop(user_key, None)
+            self.folded_users[user_key] = (vector.astype(np.float32), bias, merged)
+            # Forget the longest-unchanged users beyond capacity
+            while len(self.folded_users) > FOLD_IN_MAX_USERS:
+                self.folded_users.pop(next(iter(self.folded_users)))
+
+        return {
+            'user_id': user_id,
+            'known_user': self._user_index(user_id) is not None,
+            'rated_recipes': len(merged),
+            'ignored_recipes': ignored
+        }
+
+    def _user_vector(self, user_id):
+        """Return (factor vector, bias) for a folded-in or trained user, or None"""
+        folded = self.folded_users.get(str(user_id))
+        if folded is not None:
+            return folded[0], folded[1]
+        user_idx = self._user_index(user_id)
+        if user_idx is None:
+            return None
+        return self.user_factors[user_idx], self.user_bias[user_idx]
+
+    def user_profile(self, user_id):
+        """Current aggregated profile of a user, or None"""
+        if self.profiles is None:
+            return None
+        self.profiles.catch_up_if_stale(PROFILE_REFRESH_SECONDS)
+        return self.profiles.profile(user_id)
+
+    def _profile_prior(self, user_id):
+        """Expected rating of a user the factors cannot score: recent profile mean shrunk towards global_mean"""
+        profile = self.user_profile(user_id)
+        if profile is None or profile['recent_avg_rating'] is None:
+            return self.global_mean
+        weight = profile['recent_weight']
+        return (weight * profile['recent_avg_rating'] + PROFILE_PRIOR_WEIGHT * self.global_mean) / (
+            weight + PROFILE_PRIOR_WEIGHT)
+
+    def _user_confidence(self, user_id):
+        """Confidence for a user's scored recipes: trained users high, folded-in users by profile strength"""
+        if self._user_index(user_id) is not None:
+            return 'high'
+        if self._predicts_per_pair() and str(user_id) in self.user_mappings:
+            return 'high'
+        if str(user_id) not in self.folded_users:
+            return 'low'
+        profile = self.user_profile(user_id)
+        if profile is None or profile['profile_strength'] >= MEDIUM_PROFILE_STRENGTH:
+            return 'medium'
+        return 'low'
+
+    def _user_index(self, user_id):
+        """Return the factor row for a user, or None if the user is not in the model"""
+        if self.user_factors is None or not self.user_mappings:
+            return None
+        user_idx = self.user_mappings.get(str(user_id))
+        if user_idx is None or not 0 <= user_idx < len(self.user_factors):
+            return None
+        return user_idx
+
+    def _recipe_index(self, recipe_id):
+        """Return the factor row for a recipe, or None if the recipe is not in the model"""
+        if self.recipe_factors is None or not self.recipe_mappings:
+            return None
+        recipe_idx = self.recipe_mappings.get(str(recipe_id))
+        if recipe_idx is None or not 0 <= recipe_idx < len(self.recipe_factors):
+            return None
+        return recipe_idx
+
+    def _predicts_per_pair(self):
+        """True for a pickled model that exposes no factors but has its own predict(user_idx, recipe_idx)"""
+        return self.user_factors is None and callable(getattr(self.model, 'predict', None))
+
+    def _per_pair_predictions(self, user_ids, recipe_ids):
+        """model.predict for each user-recipe pair when the model exposes no factors.
+
+        Returns raw predictions with NaN for pairs outside the mappings or that
+        the model cannot score (all NaN when factors are loaded).
+        """
+        predictions = np.full(len(recipe_ids), np.nan)
+        if not self._predicts_per_pair():
+            return predictions
+        for position, (user_id, recipe_id) in enumerate(zip(user_ids, recipe_ids)):
+            user_idx = self.user_mappings.get(str(user_id))
+            recipe_idx = self.recipe_mappings.get(str(recipe_id))
+            if user_idx is None or recipe_idx is None:
+                continue
+            try:
+                predictions[position] = float(self.model.predict(user_idx, recipe_idx))
+            except Exception:
+                pass
+        return predictions
+
+    def _resolve_recipe_indices(self, candidate_recipes):
+        """Map candidate recipe IDs to model indices in one pass (-1 for unknown recipes)"""
+        if self.recipe_factors is None or not self.recipe_mappings:
+            return np.full(len(candidate_recipes), -1, dtype=np.int64)
+        get = self.recipe_mappings.get
+        recipe_idx = np.fromiter(
+            (-1 if (idx := get(str(recipe_id))) is None else idx for recipe_id in candidate_recipes),
+            dtype=np.int64,
+            count=len(candidate_recipes)
+        )
+        recipe_idx[recipe_idx >= len(self.recipe_factors)] = -1
+        return recipe_idx
+
+    def score_recipes(self, user_id, candidate_recipes):
+        """Score all candidate recipes for a user at once.
+
+        Returns (scores, known_mask) where known_mask marks candidates scored by the model.
+        """
+        n_candidates = len(candidate_recipes)
+        recipe_idx = self._resolve_recipe_indices(candidate_recipes)
+        user = self._user_vector(user_id)
+
+        known = recipe_idx >= 0 if user is not None else np.zeros(n_candidates, dtype=bool)
+        scores = np.empty(n_candidates, dtype=np.float64)
+
+        if known.any():
+            known_idx = recipe_idx[known]
+            user_vector, user_bias = user
+            scores[known] = (
+                self.baseline + user_bias + self.recipe_bias[known_idx]
+                + self.recipe_factors[known_idx] @ user_vector
+            )
+        elif self._predicts_per_pair():
+            predicted = self._per_pair_predictions([user_id] * n_candidates, candidate_recipes)
+            known = ~np.isnan(predicted)
+            scores[known] = predicted[known]
+
+        # Fallback: deterministic cold-start scores from the profile mean and recipe priors
+        unknown = ~known
+        if unknown.any():
+            scores[unknown] = self._profile_prior(user_id) + self._cold_start_scores()[recipe_idx[unknown]]
+
+        np.clip(scores, 1.0, 5.0, out=scores)
+        return scores, known
+
+    def predict_batch(self, user_ids, recipe_ids):
+        """Predict ratings for many user-recipe pairs at once.
+
+        Returns (predicted_ratings, confidences) in input order.
+        """
+        n_pairs = len(user_ids)
+        if not self.is_loaded:
+            return np.full(n_pairs, self.global_mean), ['low'] * n_pairs
+
+        user_idx = np.full(n_pairs, -1, dtype=np.int64)
+        if self.user_factors is not None and self.user_mappings:
+            get = self.user_mappings.get
+            user_idx = np.fromiter(
+                (-1 if (idx := get(str(user_id))) is None else idx for user_id in user_ids),
+                dtype=np.int64,
+                count=n_pairs
+            )
+            user_idx[user_idx >= len(self.user_factors)] = -1
+        recipe_idx = self._resolve_recipe_indices(recipe_ids)
+
+        known = (user_idx >= 0) & (recipe_idx >= 0)
+        predictions = np.empty(n_pairs, dtype=np.float64)
+
+        if known.any():
+            users, recipes = user_idx[known], recipe_idx[known]
+            predictions[known] = (
+                self.baseline + self.user_bias[users] + self.recipe_bias[recipes]
+                + np.einsum('ij,ij->i', self.user_factors[users], self.recipe_factors[recipes])
+            )
+        elif self._predicts_per_pair():
+            predicted = self._per_pair_predictions(user_ids, recipe_ids)
+            known = ~np.isnan(predicted)
+            predictions[known] = predicted[known]
+
+        # Fallback: deterministic cold-start scores from each user's profile mean and recipe priors
+        unknown = np.flatnonzero(~known)
+        if len(unknown) > 0:
+            priors = {}
+            for position in unknown:
+                user_id = user_ids[position]
+                if user_id not in priors:
+                    priors[user_id] = self._profile_prior(user_id)
+            predictions[unknown] = (np.fromiter((priors[user_ids[position]] for position in unknown),
+                                                dtype=np.float64, count=len(unknown))
+                                    + self._cold_start_scores()[recipe_idx[unknown]])
+
+        np.clip(predictions, 1.0, 5.0, out=predictions)
+        confidences = ['high' if is_known else 'low' for is_known in known.tolist()]
+
+        # Folded-in users override the trained factors pair by pair
+        folded_users = self.folded_users
+        if folded_users:
+            for position in [i for i, user_id in enumerate(user_ids) if str(user_id) in folded_users]:
+                if recipe_idx[position] >= 0:
+                    predictions[position] = self.predict_rating(user_ids[position], recipe_ids[position])
+                    confidences[position] = self._user_confidence(user_ids[position])
+        return predictions, confidences
+
+    def get_user_recommendations(self, user_id, candidate_recipes=None, n_recommendations=10):
+        """Get top N recommendations for a user.
+
+        candidate_recipes=None ranks the whole catalogue, served from the
+        precomputed top-K for trained users when one is attached.
+        """
         if not self.is_loaded:
             return []
             
         try:
-            predictions = []
-            
-            for recipe_id in candidate_recipes:
-                predicted_rating = self.predict_rating(user_id, recipe_id)
-                predictions.append({
-                    'recipe_id': recipe_id,
-                    'predicted_rating': predicted_rating,
-                    'confidence': self.calculate_confidence(user_id, recipe_id)
-                })
-            
-            # Sort by predicted rating
-            predictions.sort(key=lambda x: x['predicted_rating'], reverse=True)
-            
-            return predictions[:n_recommendations]
+            if candidate_recipes is None:
+                user_idx = None if str(user_id) in self.folded_users else self._user_index(user_id)
+                if self.precomputed is not None and user_idx is not None and n_recommendations <= self.precomputed.k:
+                    return self._precomputed_recommendations(user_idx, n_recommendations)
+                candidate_recipes = self._recipe_catalogue()
+
+            candidate_recipes = list(candidate_recipes)
+            if not candidate_recipes or n_recommendations <= 0:
+                return []
+
+            scores, known = self.score_recipes(user_id, candidate_recipes)
+            known_confidence = self._user_confidence(user_id)
+
+            # Partial selection of the top N, then sort only those
+            if n_recommendations < len(scores):
+                top = np.argpartition(-scores, n_recommendations - 1)[:n_recommendations]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind='stable')]
+
+            return [{
+                'recipe_id': candidate_recipes[i],
+                'predicted_rating': float(scores[i]),
+                'confidence': known_confidence if known[i] else 'low'
+            } for i in top]
             
         except Exception as e:
             print(f"Recommendation error: {str(e)}")
             return []
     
+    def _recipe_catalogue(self):
+        """Every recipe ID the factors can score, in factor-row order"""
+        if self.recipe_factors is None or not self.recipe_mappings:
+            return []
+        if self._catalogue is None:
+            self._catalogue = sorted((recipe_id for recipe_id, idx in self.recipe_mappings.items()
+                                      if 0 <= idx < len(self.recipe_factors)), key=self.recipe_mappings.get)
+        return self._catalogue
+
+    def catalogue_size(self):
+        """Number of recipes a whole-catalogue request ranks"""
+        return len(self._recipe_catalogue())
+
+    def factor_fingerprint(self):
+        """Cheap identity of the loaded factors, recorded with precomputed top-K files"""
+        return {
+            'n_users': len(self.user_factors),
+            'n_items': len(self._recipe_catalogue()),
+            'n_components': int(self.recipe_factors.shape[1]),
+            'checksum': round(float(np.asarray(self.recipe_factors, dtype=np.float64, order='C').sum())
+                              + float(np.asarray(self.user_factors[:1000], dtype=np.float64, order='C').sum()), 6)
+        }
+
+    def _open_precomputed(self):
+        """Attach the offline top-K directory when it was computed from these factors"""
+        self.precomputed = None
+        if not self.topk_path or self.user_factors is None:
+            return
+        try:
+            precomputed = PrecomputedTopK(self.topk_path)
+            if precomputed.manifest.get('fingerprint') != self.factor_fingerprint():
+                print(f"Precomputed top-K at {self.topk_path} does not match the loaded model - ignoring it")
+                return
+            self.precomputed = precomputed
+            print(f"Precomputed top-{precomputed.k} recommendations loaded from {self.topk_path}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not open precomputed top-K {self.topk_path}: {e}")
+
+    def _candidate_plan(self, candidate_recipes):
+        """Resolve a candidate list once for block scoring: (candidates, known columns, unknown columns, factors, biases)"""
+        candidates = list(candidate_recipes) if candidate_recipes else self._recipe_catalogue()
+        recipe_idx = self._resolve_recipe_indices(candidates)
+        known_cols = np.flatnonzero(recipe_idx >= 0)
+        unknown_cols = np.flatnonzero(recipe_idx < 0)
+        if len(known_cols) == len(self.recipe_factors) and np.array_equal(recipe_idx, np.arange(len(recipe_idx))):
+            # The whole catalogue in row order: use the factor matrix as is
+            factors, biases = self.recipe_factors, self.recipe_bias
+        else:
+            factors, biases = self.recipe_factors[recipe_idx[known_cols]], self.recipe_bias[recipe_idx[known_cols]]
+        return candidates, known_cols, unknown_cols, factors, biases
+
+    def get_recommendations_for_users(self, user_ids, candidate_recipes=None, n_recommendations=10):
+        """Top N recommendations for many users, in input order.
+
+        Candidates default to every recipe in the model. Trained users are
+        scored together with one matrix-matrix product and a row-wise
+        argpartition; folded-in and unknown users go through
+        get_user_recommendations.
+        """
+        if not self.is_loaded:
+            return [[] for _ in user_ids]
+        return self._recommend_block(user_ids, self._candidate_plan(candidate_recipes), n_recommendations)
+
+    def iter_recommendations_for_users(self, user_ids, candidate_recipes=None, n_recommendations=10,
+                                       block_size=BULK_BLOCK_SIZE):
+        """Yield (user_id, recommendations) for many users, scoring block_size users per product"""
+        if not self.is_loaded:
+            for user_id in user_ids:
+                yield user_id, []
+            return
+        plan = self._candidate_plan(candidate_recipes)
+        for start in range(0, len(user_ids), block_size):
+            block = user_ids[start:start + block_size]
+            yield from zip(block, self._recommend_block(block, plan, n_recommendations))
+
+    def _precomputed_recommendations(self, user_idx, n_recommendations):
+        catalogue = self._recipe_catalogue()
+        items, scores = self.precomputed.get(user_idx, n_recommendations)
+        return [{
+            'recipe_id': catalogue[item],
+            'predicted_rating': score,
+            'confidence': 'high'
+        } for item, score in zip(items.tolist(), scores.tolist())]
+
+    def _recommend_block(self, user_ids, plan, n_recommendations):
+        candidates = plan[0]
+        results = [None] * len(user_ids)
+        pending = []
+        for position, user_id in enumerate(user_ids):
+            user_idx = None if str(user_id) in self.folded_users else self._user_index(user_id)
+            if user_idx is None:
+                results[position] = self.get_user_recommendations(user_id, candidates, n_recommendations)
+            else:
+                pending.append((position, user_idx))
+
+        k = min(n_recommendations, len(candidates))
+        if not pending or k <= 0:
+            return [[] if result is None else result for result in results]
+
+        positions = [position for position, _ in pending]
+        rows = np.array([user_idx for _, user_idx in pending])
+        top, top_scores = self._score_block(rows, plan, k, [user_ids[position] for position in positions])
+
+        known = np.zeros(len(candidates), dtype=bool)
+        known[plan[1]] = True
+        for position, columns, column_scores in zip(positions, top.tolist(), top_scores.tolist()):
+            results[position] = [{
+                'recipe_id': candidates[column],
+                'predicted_rating': score,
+                'confidence': 'high' if known[column] else 'low'
+            } for column, score in zip(columns, column_scores)]
+        return results
+
+    def _score_block(self, rows, plan, k, user_ids=None):
+        """Top k candidate columns and their scores for a block of trained user rows, best first"""
+        candidates, known_cols, unknown_cols, factors, biases = plan
+        scores = np.empty((len(rows), len(candidates)), dtype=np.float64)
+        scores[:, known_cols] = (
+            self.baseline + self.user_bias[rows][:, None] + biases[None, :]
+            + self.user_factors[rows] @ factors.T
+        )
+        if len(unknown_cols) > 0:
+            # Recipes outside the model: each user's cold-start prior (no recipe offset)
+            priors = np.fromiter((self._profile_prior(user_id) for user_id in user_ids),
+                                 dtype=np.float64, count=len(rows))
+            scores[:, unknown_cols] = priors[:, None]
+        np.clip(scores, 1.0, 5.0, out=scores)
+
+        # Row-wise partial selection of the top k, then sort only those
+        if k < len(candidates):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(candidates)), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
     def calculate_confidence(self, user_id, recipe_id):
         """Calculate confidence score for prediction"""
-        user_idx = self.user_mappings.get(str(user_id))
-        recipe_idx = self.recipe_mappings.get(str(recipe_id))
-        
-        if user_idx is None or recipe_idx is None:
+        if self._predicts_per_pair():
+            if str(recipe_id) not in self.recipe_mappings:
+                return 'low'
+        elif self._recipe_index(recipe_id) is None:
             return 'low'
-        
-        # Simple confidence based on whether user/item are in training data
-        return 'high' if user_idx is not None and recipe_idx is not None else 'medium'
+
+        # Trained users are high; folded-in users depend on how established their profile is
+        return self._user_confidence(user_id)
     
+    def warm_up(self, n_users=5):
+        """Exercise the scoring paths once so the first real requests do not pay for page faults"""
+        if not self.is_loaded or not self.user_mappings or not self.recipe_mappings:
+            return
+        user_ids = list(self.user_mappings)[:n_users]
+        recipe_ids = list(self.recipe_mappings)
+        for user_id in user_ids:
+            self.get_user_recommendations(user_id, recipe_ids, 10)
+
     def get_model_info(self):
         """Get model information"""
         return {
@@ -191,32 +885,175 @@ class FoodRecommendationModel:
             'global_mean': self.global_mean,
             'num_users': len(self.user_mappings) if self.user_mappings else 0,
             'num_recipes': len(self.recipe_mappings) if self.recipe_mappings else 0,
-            'model_type': 'SVD' if self.model else 'None'
+            'model_type': 'SVD' if self.model is not None or self.user_factors is not None else 'None',
+            'model_version': self.model_version,
+            'num_components': int(self.user_factors.shape[1]) if self.user_factors is not None else 0,
+            'folded_users': len(self.folded_users),
+            'profiles': len(self.profiles) if self.profiles is not None else 0
         }
 
+def interaction_log_dir():
+    """Directory of the interaction log and profile checkpoint (FOOD_INTERACTION_LOG_DIR)"""
+    return os.environ.get('FOOD_INTERACTION_LOG_DIR',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interaction_log'))
+
+# Profiles are shared by every model snapshot and follow the interaction log
+# once it is opened (FOOD_PROFILE_HALF_LIFE_DAYS sets the decay)
+profile_aggregator = ProfileAggregator(
+    os.path.join(interaction_log_dir(), 'profiles_checkpoint.json'),
+    half_life_days=float(os.environ.get('FOOD_PROFILE_HALF_LIFE_DAYS', 14))
+)
+
 # Initialize model
-recommendation_model = FoodRecommendationModel()
+def create_model():
+    """Create a model configured from the environment"""
+    # FOOD_MODEL_ARTIFACT may point at a converted artifact directory
+    # FOOD_PRECOMPUTED_TOPK may point at an offline top-K directory for whole-catalogue requests
+    return FoodRecommendationModel(artifact_dir=os.environ.get('FOOD_MODEL_ARTIFACT'),
+                                   profiles=profile_aggregator,
+                                   topk_path=os.environ.get('FOOD_PRECOMPUTED_TOPK'))
+
+# Initialize model. This reference is the serving snapshot: routes read it
+# once per request and reload_model() replaces it atomically.
+recommendation_model = create_model()
+
+_reload_lock = threading.Lock()
+reload_status = {'state': 'idle', 'model_version': 0, 'error': None, 'duration': None}
+
+def reload_model():
+    """Build, load and warm a new model off to the side, then swap it in.
+
+    The model is re-read from the configured location (FOOD_MODEL_ARTIFACT or
+    the model directory), never from request input. In-flight requests keep
+    using the model they started with, so no request ever sees mixed state.
+    Returns (success, message).
+    """
+    global recommendation_model
+    if not _reload_lock.acquire(blocking=False):
+        return False, 'reload already in progress'
+
+    try:
+        start = time.time()
+        reload_status.update({'state': 'loading', 'error': None})
+        candidate = create_model()
+        if not candidate.load_model():
+            reload_status.update({'state': 'failed', 'error': 'could not load model'})
+            return False, reload_status['error']
+
+        # Re-fold users added since the last load against the new factors
+        if candidate.recipe_factors is not None:
+            for user_id, (_, _, ratings) in list(recommendation_model.folded_users.items()):
+                try:
+                    candidate.fold_in_user(user_id, ratings)
+                except ValueError:
+                    # None of the user's recipes survived into the new model
+                    pass
+
+        candidate.warm_up()
+        candidate.model_version = recommendation_model.model_version + 1
+        recommendation_model = candidate
+
+        reload_status.update({
+            'state': 'idle',
+            'model_version': candidate.model_version,
+            'duration': time.time() - start
+        })
+        print(f"Model version {candidate.model_version} is now serving")
+        return True, 'model reloaded'
+
+    except Exception as e:
+        print(f"Error reloading model: {str(e)}")
+        reload_status.update({'state': 'failed', 'error': str(e)})
+        return False, str(e)
+    finally:
+        _reload_lock.release()
+
+_interaction_store = None
+_interaction_store_lock = threading.Lock()
+
+def import_legacy_interactions(store=None):
+    """Import user_history.json into a new interaction log, once across all processes.
+
+    Pre-fork servers call this in the master before forking; workers then
+    find the import marker and skip it.
+    """
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    if store is None:
+        store = InteractionStore(interaction_log_dir(),
+                                 retention_days=float(os.environ.get('FOOD_INTERACTION_RETENTION_DAYS', 30)))
+    imported = store.import_legacy_history_once(os.path.join(base_dir, 'user_history.json'))
+    if imported:
+        print(f"Imported {imported} interactions from user_history.json")
+    return imported
+
+def get_interaction_store():
+    """Open the interaction log on first use and start its expiry and profile checkpoint threads"""
+    # FOOD_INTERACTION_RETENTION_DAYS, FOOD_INTERACTION_EXPIRY_INTERVAL and
+    # FOOD_PROFILE_CHECKPOINT_INTERVAL (seconds, 0 disables) configure it
+    global _interaction_store
+    with _interaction_store_lock:
+        if _interaction_store is None:
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            store = InteractionStore(
+                interaction_log_dir(),
+                retention_days=float(os.environ.get('FOOD_INTERACTION_RETENTION_DAYS', 30))
+            )
+            # A no-op once the master (or another worker) has done it
+            import_legacy_interactions(store)
+            store.start_expiry(float(os.environ.get('FOOD_INTERACTION_EXPIRY_INTERVAL', 3600)))
+
+            profile_aggregator.attach(store, os.path.join(base_dir, 'user_profiles.json'))
+            profile_aggregator.start_checkpointing(float(os.environ.get('FOOD_PROFILE_CHECKPOINT_INTERVAL', 300)))
+            print(f"Interaction log opened: {len(profile_aggregator)} user profiles")
+            _interaction_store = store
+        return _interaction_store
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    model = recommendation_model
     return jsonify({
         'status': 'healthy',
-        'model_loaded': recommendation_model.is_loaded
+        'model_loaded': model.is_loaded,
+        'model_version': model.model_version
     })
 
 @app.route('/load_model', methods=['POST'])
 def load_model():
-    """Load the recommendation model"""
-    success = recommendation_model.load_model()
+    """Load the recommendation model from its configured location without downtime (optionally in the background)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    if 'artifact_dir' in data:
+        # The served model must come from the server's configuration, not the client
+        return jsonify({'error': 'artifact_dir cannot be set per request; configure FOOD_MODEL_ARTIFACT'}), 400
+
+    if data.get('background'):
+        if reload_status['state'] == 'loading':
+            return jsonify({'success': False, 'error': 'reload already in progress'}), 409
+        threading.Thread(target=reload_model, daemon=True).start()
+        return jsonify({'success': True, 'status': 'reload started'}), 202
+
+    success, message = reload_model()
     return jsonify({
         'success': success,
+        'message': message,
         'model_info': recommendation_model.get_model_info()
     })
 
+@app.route('/reload_status', methods=['GET'])
+def get_reload_status():
+    """Get the state of the most recent model reload"""
+    return jsonify({
+        'success': True,
+        'reload': reload_status,
+        'serving_model_version': recommendation_model.model_version
+    })
+
 @app.route('/predict', methods=['POST'])
 def predict_rating():
     """Predict rating for user-recipe pair"""
+    model = recommendation_model
     try:
         data = request.get_json()
         user_id = data.get('user_id')
@@ -225,32 +1062,90 @@ def predict_rating():
         if not user_id or not recipe_id:
             return jsonify({'error': 'user_id and recipe_id required'}), 400
         
-        prediction = recommendation_model.predict_rating(user_id, recipe_id)
+        prediction = model.predict_rating(user_id, recipe_id)
         
         return jsonify({
             'success': True,
             'user_id': user_id,
             'recipe_id': recipe_id,
             'predicted_rating': prediction,
-            'confidence': recommendation_model.calculate_confidence(user_id, recipe_id)
+            'confidence': model.calculate_confidence(user_id, recipe_id)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict ratings for many user-recipe pairs in one call"""
+    model = recommendation_model
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            user_ids, recipe_ids = parse_batch_pairs(data, 'recipe_id')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if len(user_ids) > MAX_BATCH_PAIRS:
+            return jsonify({'error': f'at most {MAX_BATCH_PAIRS} pairs per batch'}), 400
+
+        predictions, confidences = model.predict_batch(user_ids, recipe_ids)
+
+        if data.get('format') == 'columnar':
+            return jsonify({
+                'success': True,
+                'count': len(user_ids),
+                'user_ids': user_ids,
+                'recipe_ids': recipe_ids,
+                'predicted_ratings': predictions.tolist(),
+                'confidences': confidences
+            })
+
+        return jsonify({
+            'success': True,
+            'count': len(user_ids),
+            'predictions': [{
+                'user_id': user_id,
+                'recipe_id': recipe_id,
+                'predicted_rating': rating,
+                'confidence': confidence
+            } for user_id, recipe_id, rating, confidence in zip(user_ids, recipe_ids, predictions.tolist(), confidences)]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def parse_recommendation_request(data):
+    """(user_id, candidate_recipes, n_recommendations) from a /recommendations body.
+
+    Omitting candidate_recipes (None) ranks the whole catalogue. Raises
+    ValueError with a client-facing message for a malformed payload.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    user_id = data.get('user_id')
+    if not user_id:
+        raise ValueError('user_id required')
+    if not is_id(user_id):
+        raise ValueError('user_id must be a string or integer')
+    candidate_recipes = data.get('candidate_recipes')
+    if candidate_recipes is not None:
+        id_list(candidate_recipes, 'candidate_recipes')
+    n_recommendations = positive_int(data.get('n_recommendations', 10), 'n_recommendations')
+    return user_id, candidate_recipes, n_recommendations
+
 @app.route('/recommendations', methods=['POST'])
 def get_recommendations():
     """Get recommendations for a user"""
+    model = recommendation_model
     try:
-        data = request.get_json()
-        user_id = data.get('user_id')
-        candidate_recipes = data.get('candidate_recipes', [])
-        n_recommendations = data.get('n_recommendations', 10)
-        
-        if not user_id:
-            return jsonify({'error': 'user_id required'}), 400
+        try:
+            user_id, candidate_recipes, n_recommendations = parse_recommendation_request(
+                request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        recommendations = recommendation_model.get_user_recommendations(
+        recommendations = model.get_user_recommendations(
             user_id, candidate_recipes, n_recommendations
         )
         
@@ -258,24 +1153,190 @@ def get_recommendations():
             'success': True,
             'user_id': user_id,
             'recommendations': recommendations,
-            'total_candidates': len(candidate_recipes),
+            'total_candidates': model.catalogue_size() if candidate_recipes is None else len(candidate_recipes),
             'returned_count': len(recommendations)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def parse_bulk_request(data):
+    """(user_ids, candidate_recipes, n_recommendations, block_size) from a /recommendations/bulk body.
+
+    Omitted or empty candidate_recipes (None) rank the whole catalogue. Raises
+    ValueError with a client-facing message for a malformed payload.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    if not data.get('user_ids'):
+        raise ValueError('user_ids list required')
+    user_ids = id_list(data['user_ids'], 'user_ids')
+    candidate_recipes = data.get('candidate_recipes') or None
+    if candidate_recipes is not None:
+        id_list(candidate_recipes, 'candidate_recipes')
+    n_recommendations = positive_int(data.get('n_recommendations', 10), 'n_recommendations')
+    block_size = positive_int(data.get('block_size', BULK_BLOCK_SIZE), 'block_size')
+    return user_ids, candidate_recipes, n_recommendations, block_size
+
+@app.route('/recommendations/bulk', methods=['POST'])
+def get_bulk_recommendations():
+    """Stream top-N recommendations for many users as JSON lines, scored in blocks"""
+    model = recommendation_model
+    try:
+        # Validated up front: the stream cannot turn into a 400 once it has started
+        try:
+            user_ids, candidate_recipes, n_recommendations, block_size = parse_bulk_request(
+                request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if len(user_ids) > MAX_BULK_USERS:
+            return jsonify({'error': f'at most {MAX_BULK_USERS} users per request'}), 413
+        if not model.is_loaded:
+            return jsonify({'error': 'Model not loaded'}), 503
+
+        def generate():
+            for user_id, recommendations in model.iter_recommendations_for_users(
+                    user_ids, candidate_recipes, n_recommendations, block_size):
+                yield json.dumps({'user_id': user_id, 'recommendations': recommendations}) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/fold_in', methods=['POST'])
+def fold_in_user():
+    """Fold a new or active user's recipe ratings into the model without retraining"""
+    model = recommendation_model
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data.get('user_id') or not data.get('ratings'):
+            return jsonify({'error': 'user_id and ratings required'}), 400
+        user_id = data['user_id']
+        if not is_id(user_id):
+            return jsonify({'error': 'user_id must be a string or integer'}), 400
+        # Accept {recipe_id: rating} or [{recipe_id, rating}, ...]
+        try:
+            ratings = parse_ratings(data['ratings'], 'recipe_id')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if model.recipe_factors is None:
+            return jsonify({'error': 'Model factors not loaded'}), 503
+
+        start = time.time()
+        try:
+            result = model.fold_in_user(user_id, ratings)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            **result,
+            'fold_in_time': time.time() - start
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/interactions', methods=['POST'])
+def record_interaction():
+    """Append a user interaction to the log; users unknown to the model are folded in from their history"""
+    model = recommendation_model
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id')
+        recipe_id = data.get('recipe_id')
+        rating = data.get('rating')
+        interaction_type = data.get('interaction_type', 'rating')
+
+        if not user_id or recipe_id is None:
+            return jsonify({'error': 'user_id and recipe_id required'}), 400
+        if rating is not None:
+            try:
+                rating = float(rating)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'rating must be numeric'}), 400
+            if not 1.0 <= rating <= 5.0:
+                return jsonify({'error': 'rating must be between 1 and 5'}), 400
+
+        store = get_interaction_store()
+        record = store.append(user_id, recipe_id, rating, interaction_type)
+        profile_aggregator.catch_up()
+
+        folded = None
+        if rating is not None and model.recipe_factors is not None and model._user_index(user_id) is None:
+            # Latest rating per recipe from the user's live history
+            ratings = {str(item['recipe_id']): item['rating'] for item in store.history(user_id)
+                       if item.get('rating') is not None}
+            try:
+                folded = model.fold_in_user(user_id, ratings)
+            except ValueError:
+                # Only recipes outside the model so far: keep cold-start scoring
+                folded = None
+
+        return jsonify({
+            'success': True,
+            'interaction': record,
+            'profile': profile_aggregator.profile(user_id),
+            'fold_in': folded
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/interactions/<user_id>', methods=['GET'])
+def get_user_history(user_id):
+    """Return a user's interactions within the retention window (or the last `days` days)"""
+    try:
+        days = request.args.get('days', type=float)
+        since = time.time() - days * 86400 if days else None
+        history = get_interaction_store().history(user_id, since=since)
+        return jsonify({
+            'success': True,
+            'user_id': user_id,
+            'history': history,
+            'count': len(history)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/profiles/<user_id>', methods=['GET'])
+def get_user_profile(user_id):
+    """Incrementally aggregated profile of a user"""
+    get_interaction_store()
+    profile_aggregator.catch_up()
+    profile = profile_aggregator.profile(user_id)
+    if profile is None:
+        return jsonify({'error': 'profile not found', 'user_id': user_id}), 404
+    return jsonify({'success': True, 'profile': profile})
+
+@app.route('/interactions', methods=['GET'])
+def get_interaction_log_stats():
+    """Size and time range of the interaction log"""
+    return jsonify({'success': True, 'interaction_log': get_interaction_store().stats()})
+
+@app.route('/interactions/expire', methods=['POST'])
+def expire_interactions():
+    """Drop log segments older than the retention window now instead of waiting for the timer"""
+    try:
+        return jsonify({'success': True, **get_interaction_store().expire()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/model_info', methods=['GET'])
 def get_model_info():
     """Get model information"""
+    model = recommendation_model
     return jsonify({
         'success': True,
-        'model_info': recommendation_model.get_model_info()
+        'model_info': model.get_model_info()
     })
 
 @app.route('/accuracy', methods=['GET'])
 def get_accuracy():
     """Get model accuracy metrics"""
+    model = recommendation_model
     try:
         # Load deployment package for accuracy info
         deployment_path = os.path.join(os.path.dirname(__file__), 'deployment_package.json')
@@ -292,7 +1353,7 @@ def get_accuracy():
                     'rmse': performance.get('rmse', 0.61),
                     'mae': performance.get('mae', 0.43),
                     'training_time': performance.get('training_time', 0.63),
-                    'model_ready': recommendation_model.is_loaded,
+                    'model_ready': model.is_loaded,
                     'real_model': True
                 }
             })
@@ -320,6 +1381,7 @@ if __name__ == '__main__':
             print("Model loaded successfully on startup")
         else:
             print("Model not loaded on startup - will try again on first request")
+        get_interaction_store()
 
         # Start Flask server
         print("Flask server starting on port 5001...")
@@ -330,4 +1392,5 @@ if __name__ == '__main__':
             print("Model loaded successfully")
         else:
             print("Model not loaded - will try on first request")
+        get_interaction_store()
         app.run(host='0.0.0.0', port=5001, debug=False)
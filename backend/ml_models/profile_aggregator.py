@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Incremental user-profile aggregation for the food recommendation service
+Keeps avg_rating, total_interactions and profile_strength up to date from the
+interaction log with running sums and time-decayed weights, instead of
+recomputing user_profiles.json from full histories.
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from datetime import datetime
+
+# Decayed interaction weight at which a profile counts as fully formed
+FULL_PROFILE_WEIGHT = 10.0
+
+CHECKPOINT_FORMAT = 'food-profile-checkpoint/1'
+
+# Per-user state slots
+_TOTAL, _RATED, _RATING_SUM, _WEIGHT, _WEIGHTED_RATING_SUM, _WEIGHTED_RATED, _LAST_TS = range(7)
+
+
+class ProfileAggregator:
+    """Running per-user interaction statistics with exponential time decay.
+
+    Every interaction adds to lifetime counts and rating sums and to decayed
+    sums that halve every half_life_days, so recent behaviour dominates
+    profile_strength and recent_avg_rating. Lifetime interaction counts per
+    recipe are kept alongside as a popularity signal. Each update is O(1).
+
+    State is checkpointed together with the interaction-log position it
+    covers; after a restart only records appended since then are replayed.
+    """
+
+    def __init__(self, checkpoint_path=None, half_life_days=14.0):
+        self.checkpoint_path = checkpoint_path
+        self.decay_rate = math.log(2) / (half_life_days * 86400)
+        self.position = None
+        self.store = None
+        self.last_catch_up = 0.0
+        self._users = {}
+        self._recipes = {}
+        self._lock = threading.Lock()
+        # Serialises log replay so records are applied once and checkpoints match their position
+        self._catch_up_lock = threading.Lock()
+        self._checkpoint_thread = None
+
+    def _decay(self, seconds):
+        return math.exp(-self.decay_rate * seconds)
+
+    def add(self, user_id, rating=None, timestamp=None, recipe_id=None):
+        """Fold one interaction into the user's running statistics"""
+        ts = time.time() if timestamp is None else float(timestamp)
+        self.count_recipe(recipe_id)
+        with self._lock:
+            state = self._users.get(str(user_id))
+            if state is None:
+                state = self._users[str(user_id)] = [0, 0, 0.0, 0.0, 0.0, 0.0, ts]
+
+            # Decay existing weights to the newer of the two timestamps
+            if ts >= state[_LAST_TS]:
+                factor = self._decay(ts - state[_LAST_TS])
+                state[_WEIGHT] *= factor
+                state[_WEIGHTED_RATING_SUM] *= factor
+                state[_WEIGHTED_RATED] *= factor
+                state[_LAST_TS] = ts
+                weight = 1.0
+            else:
+                weight = self._decay(state[_LAST_TS] - ts)
+
+            state[_TOTAL] += 1
+            state[_WEIGHT] += weight
+            if rating is not None:
+                rating = float(rating)
+                state[_RATED] += 1
+                state[_RATING_SUM] += rating
+                state[_WEIGHTED_RATING_SUM] += weight * rating
+                state[_WEIGHTED_RATED] += weight
+
+    def count_recipe(self, recipe_id):
+        """Count one interaction towards a recipe's popularity only"""
+        if recipe_id is None:
+            return
+        recipe_key = str(recipe_id)
+        with self._lock:
+            self._recipes[recipe_key] = self._recipes.get(recipe_key, 0) + 1
+
+    def attach(self, store, legacy_profiles_path=None):
+        """Follow an interaction log, resuming from the checkpoint when there is one.
+
+        Without a checkpoint the whole live log is replayed once. Users seeded
+        from legacy user_profiles.json totals, which already cover their
+        records in the existing log, only count those records towards recipe
+        popularity; every other user (e.g. imported from user_history.json)
+        is built from the log.
+        """
+        self.store = store
+        if not self.load_checkpoint():
+            seeded = self.seed_from_profiles(legacy_profiles_path) if legacy_profiles_path else set()
+            self.catch_up(skip_users=seeded, until=store.end_position() or (0, 0))
+        self.catch_up()
+
+    def catch_up(self, skip_users=(), until=None):
+        """Apply the interaction-log records appended since the last call; returns how many.
+
+        Replay stops after position until when given. Records of skip_users
+        only count towards recipe popularity.
+        """
+        if self.store is None:
+            return 0
+        applied = 0
+        with self._catch_up_lock:
+            for record, position in self.store.iter_after(self.position):
+                if until is not None and position > until:
+                    break
+                if str(record.get('user_id')) in skip_users:
+                    self.count_recipe(record.get('recipe_id'))
+                else:
+                    self.add(record.get('user_id'), record.get('rating'), record.get('ts'), record.get('recipe_id'))
+                self.position = position
+                applied += 1
+            self.last_catch_up = time.time()
+        return applied
+
+    def catch_up_if_stale(self, max_age):
+        """Catch up when the last catch-up is older than max_age seconds (records from other workers)"""
+        if self.store is not None and time.time() - self.last_catch_up >= max_age:
+            self.catch_up()
+
+    def profile(self, user_id, now=None):
+        """Profile dict in the user_profiles.json layout plus the decayed statistics, or None"""
+        with self._lock:
+            state = self._users.get(str(user_id))
+            if state is None:
+                return None
+            state = list(state)
+
+        factor = self._decay(max(0.0, (time.time() if now is None else now) - state[_LAST_TS]))
+        weight = state[_WEIGHT] * factor
+        recent_rated = state[_WEIGHTED_RATED]
+        return {
+            'user_id': user_id,
+            'avg_rating': state[_RATING_SUM] / state[_RATED] if state[_RATED] else 0.0,
+            'total_interactions': state[_TOTAL],
+            'last_updated': datetime.fromtimestamp(state[_LAST_TS]).isoformat(),
+            'profile_strength': min(1.0, weight / FULL_PROFILE_WEIGHT),
+            'recent_avg_rating': state[_WEIGHTED_RATING_SUM] / recent_rated if recent_rated else None,
+            'recent_weight': weight
+        }
+
+    def recipe_counts(self):
+        """Copy of the lifetime interaction count per recipe_id"""
+        with self._lock:
+            return dict(self._recipes)
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._users
+
+    def __len__(self):
+        return len(self._users)
+
+    def seed_from_profiles(self, path):
+        """Start from a legacy user_profiles.json document; returns the set of seeded user ids"""
+        if not os.path.exists(path):
+            return set()
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+
+        with self._lock:
+            for user_id, profile in profiles.items():
+                total = int(profile.get('total_interactions', 0))
+                avg_rating = float(profile.get('avg_rating', 0.0))
+                try:
+                    last_ts = datetime.fromisoformat(profile['last_updated']).timestamp()
+                except (KeyError, ValueError):
+                    last_ts = time.time()
+                self._users[str(user_id)] = [total, total, avg_rating * total, float(total),
+                                             avg_rating * total, float(total), last_ts]
+        return {str(user_id) for user_id in profiles}
+
+    def save_checkpoint(self):
+        """Write state and log position atomically to checkpoint_path"""
+        if not self.checkpoint_path:
+            return
+        with self._catch_up_lock, self._lock:
+            snapshot = {
+                'format': CHECKPOINT_FORMAT,
+                'position': self.position,
+                'users': self._users,
+                'recipes': self._recipes
+            }
+            tmp_path = f"{self.checkpoint_path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        """Restore state from checkpoint_path; returns False when there is none"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except ValueError:
+            return False
+        if snapshot.get('format') != CHECKPOINT_FORMAT:
+            return False
+
+        with self._lock:
+            self._users = snapshot['users']
+            self._recipes = snapshot.get('recipes', {})
+            self.position = tuple(snapshot['position']) if snapshot['position'] else None
+        return True
+
+    def start_checkpointing(self, interval):
+        """Save a checkpoint every interval seconds on a daemon thread"""
+        if self._checkpoint_thread is not None or interval <= 0 or not self.checkpoint_path:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.catch_up()
+                    self.save_checkpoint()
+                except Exception as e:
+                    print(f"Profile checkpoint error: {e}")
+
+        self._checkpoint_thread = threading.Thread(target=run, daemon=True)
+        self._checkpoint_thread.start()
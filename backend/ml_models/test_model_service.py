@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the food recommendation service routes and model
+
+Run with: python -m pytest test_model_service.py
+"""
+
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import model_service as service
+
+
+class PairModel:
+    """Pickled model that predicts single pairs but exposes no factors"""
+
+    def predict(self, user_idx, recipe_idx):
+        return 1.0 + (user_idx + 2 * recipe_idx) % 5
+
+
+def write_model(model_dir, n_users=20, n_recipes=15, n_components=4, seed=0, model_data=None):
+    """Pickle a small factor model and its ID mappings in the training notebook layout"""
+    rng = np.random.default_rng(seed)
+    with open(os.path.join(model_dir, 'complete_food_recommendation_model.pkl'), 'wb') as f:
+        pickle.dump(model_data or {
+            'model': None,
+            'global_mean': 4.0,
+            'user_factors': rng.random((n_users, n_components)),
+            'recipe_factors': rng.random((n_recipes, n_components))
+        }, f)
+    with open(os.path.join(model_dir, 'recommendation_mappings.pkl'), 'wb') as f:
+        pickle.dump({
+            'user_mappings': {str(i): i for i in range(n_users)},
+            'recipe_mappings': {str(i): i for i in range(n_recipes)}
+        }, f)
+
+
+class FoodServiceTestCase(unittest.TestCase):
+    """Serves a small generated model through the Flask test client"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_model(self.directory)
+        self.model = service.FoodRecommendationModel(model_dir=self.directory)
+        self.assertTrue(self.model.load_model())
+        self.serving, service.recommendation_model = service.recommendation_model, self.model
+        self.client = service.app.test_client()
+
+    def tearDown(self):
+        service.recommendation_model = self.serving
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class BulkRecommendationsTest(FoodServiceTestCase):
+
+    def test_streams_every_user(self):
+        user_ids = [str(i) for i in range(7)]
+        response = self.client.post('/recommendations/bulk',
+                                    json={'user_ids': user_ids, 'n_recommendations': 3, 'block_size': 2})
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['user_id'] for line in lines], user_ids)
+        self.assertTrue(all(len(line['recommendations']) == 3 for line in lines))
+
+    def test_rejects_malformed_payload_before_streaming(self):
+        for body in ({'user_ids': ['1'], 'block_size': 0},
+                     {'user_ids': ['1'], 'block_size': -4},
+                     {'user_ids': ['1'], 'block_size': '2'},
+                     {'user_ids': ['1'], 'n_recommendations': '5'},
+                     {'user_ids': ['1'], 'n_recommendations': 0},
+                     {'user_ids': ['1'], 'candidate_recipes': '123'},
+                     {'user_ids': '1'},
+                     {'user_ids': [['1']]},
+                     {'user_ids': []},
+                     ['1']):
+            response = self.client.post('/recommendations/bulk', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.get_json())
+
+
+class FoldInTest(FoodServiceTestCase):
+
+    def test_folds_in_new_user(self):
+        for ratings in ({'1': 4, '2': 5},
+                        [{'recipe_id': '1', 'rating': 4}]):
+            response = self.client.post('/fold_in', json={'user_id': 'new-user', 'ratings': ratings})
+            self.assertEqual(response.status_code, 200, response.get_json())
+            self.assertTrue(response.get_json()['success'])
+
+    def test_rejects_malformed_ratings(self):
+        for body in ({'user_id': 'new-user', 'ratings': '1'},
+                     {'user_id': 'new-user', 'ratings': [4, 5]},
+                     {'user_id': 'new-user', 'ratings': [['1', 4]]},
+                     {'user_id': 'new-user', 'ratings': [{'recipe_id': ['1'], 'rating': 4}]},
+                     {'user_id': 'new-user', 'ratings': {'1': 'high'}},
+                     {'user_id': 'new-user', 'ratings': {'1': [4]}},
+                     {'user_id': 'new-user', 'ratings': {'1': True}},
+                     {'user_id': 'new-user', 'ratings': {'1': 7}},
+                     {'user_id': ['new-user'], 'ratings': {'1': 4}},
+                     {'user_id': 'new-user'},
+                     ['new-user']):
+            response = self.client.post('/fold_in', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.get_json())
+
+
+class PerPairModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_model(self.directory, model_data={'model': PairModel(), 'global_mean': 4.0})
+        self.model = service.FoodRecommendationModel(model_dir=self.directory)
+        self.assertTrue(self.model.load_model())
+        self.assertIsNone(self.model.user_factors)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_mapped_pairs_use_model_predict(self):
+        expected = PairModel().predict(3, 4)
+        self.assertEqual(self.model.predict_rating('3', '4'), expected)
+        self.assertEqual(self.model.calculate_confidence('3', '4'), 'high')
+
+        predictions, confidences = self.model.predict_batch(['3', 'unknown', '3'], ['4', '4', 'unknown'])
+        self.assertEqual(predictions[0], expected)
+        self.assertEqual(confidences, ['high', 'low', 'low'])
+
+    def test_recommendations_rank_by_model_predict(self):
+        candidates = [str(i) for i in range(10)]
+        recommendations = self.model.get_user_recommendations('2', candidates, 3)
+        expected = sorted(candidates, key=lambda recipe_id: -PairModel().predict(2, int(recipe_id)))[:3]
+        self.assertEqual([r['recipe_id'] for r in recommendations], expected)
+        self.assertTrue(all(r['confidence'] == 'high' for r in recommendations))
+
+
+if __name__ == '__main__':
+    unittest.main()
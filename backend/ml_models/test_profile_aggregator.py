@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for ProfileAggregator replaying the interaction log
+
+Run with: python -m pytest test_profile_aggregator.py
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from interaction_store import InteractionStore
+from profile_aggregator import ProfileAggregator
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BASE_DIR, 'user_history.json')
+PROFILES_PATH = os.path.join(BASE_DIR, 'user_profiles.json')
+
+
+class AttachTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # The shipped history is older than the default retention window
+        self.store = InteractionStore(self.directory, retention_days=36500)
+        self.imported = self.store.import_legacy_history_once(HISTORY_PATH)
+        with open(HISTORY_PATH, 'r', encoding='utf-8') as f:
+            self.history = json.load(f)
+        with open(PROFILES_PATH, 'r', encoding='utf-8') as f:
+            self.profiles = json.load(f)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_imported_history_builds_every_profile(self):
+        aggregator = ProfileAggregator()
+        aggregator.attach(self.store, PROFILES_PATH)
+
+        self.assertEqual(self.imported, sum(len(records) for records in self.history.values()))
+        self.assertEqual(len(aggregator), len(self.history))
+        for user_id, records in self.history.items():
+            profile = aggregator.profile(user_id)
+            self.assertIsNotNone(profile, user_id)
+            if user_id in self.profiles:
+                self.assertEqual(profile['total_interactions'], self.profiles[user_id]['total_interactions'])
+            else:
+                self.assertEqual(profile['total_interactions'], len(records))
+                ratings = [record['rating'] for record in records]
+                self.assertAlmostEqual(profile['avg_rating'], sum(ratings) / len(ratings))
+
+        counts = aggregator.recipe_counts()
+        self.assertEqual(sum(counts.values()), self.imported)
+        for records in self.history.values():
+            for record in records:
+                self.assertIn(str(record['recipe_id']), counts)
+
+    def test_seeded_users_take_new_records(self):
+        aggregator = ProfileAggregator()
+        aggregator.attach(self.store, PROFILES_PATH)
+        user_id = next(iter(self.profiles))
+        total = aggregator.profile(user_id)['total_interactions']
+
+        self.store.append(user_id, 1, 4)
+        aggregator.catch_up()
+        self.assertEqual(aggregator.profile(user_id)['total_interactions'], total + 1)
+
+    def test_checkpoint_resumes_without_replaying(self):
+        checkpoint = os.path.join(self.directory, 'profiles_checkpoint.json')
+        aggregator = ProfileAggregator(checkpoint)
+        aggregator.attach(self.store, PROFILES_PATH)
+        aggregator.save_checkpoint()
+
+        restored = ProfileAggregator(checkpoint)
+        restored.attach(self.store, PROFILES_PATH)
+        self.assertEqual(restored.recipe_counts(), aggregator.recipe_counts())
+        for user_id in self.history:
+            self.assertEqual(restored.profile(user_id)['total_interactions'],
+                             aggregator.profile(user_id)['total_interactions'])
+
+
+if __name__ == '__main__':
+    unittest.main()
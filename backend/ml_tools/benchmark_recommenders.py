@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation benchmark for the room and food recommenders
+Reports rating accuracy (RMSE, MAE), ranking quality (precision@k, recall@k,
+NDCG@k) and serving latency/throughput, as JSON for regression tracking.
+
+Usage:
+  python benchmark_recommenders.py --sizes 1000,10000 --output results.json
+  python benchmark_recommenders.py --models room --room-model ../rooms_ml_models/room_model_artifact \
+      --holdout-file room_holdout.csv
+
+Without --room-model/--food-model-dir a synthetic model is generated per
+catalogue size and evaluated on its own held-out ratings. Holdout files are
+CSV or JSON lines with user_id, item_id and rating fields.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import pickle
+import argparse
+import platform
+import tempfile
+import contextlib
+from collections import defaultdict
+
+import numpy as np
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'rooms_ml_models'))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'ml_models'))
+sys.path.insert(0, TOOLS_DIR)
+
+from synthetic_data import make_room_model, make_food_model
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the recommendation models')
+    parser.add_argument('--models', default='room,food', help='comma-separated: room, food')
+    parser.add_argument('--sizes', default='1000,5000', help='catalogue sizes for synthetic models')
+    parser.add_argument('--users', type=int, default=2000, help='users in synthetic models')
+    parser.add_argument('--ratings-per-user', type=int, default=20)
+    parser.add_argument('--components', type=int, default=25)
+    parser.add_argument('--holdout-fraction', type=float, default=0.2)
+    parser.add_argument('--k', type=int, default=10, help='cut-off for ranking metrics')
+    parser.add_argument('--eval-users', type=int, default=500, help='users sampled for ranking metrics')
+    parser.add_argument('--latency-calls', type=int, default=200, help='timed calls per operation')
+    parser.add_argument('--room-model', help='room model .pkl or artifact directory instead of synthetic data')
+    parser.add_argument('--food-model-dir', help='directory with the food model pickles or artifact')
+    parser.add_argument('--holdout-file', help='held-out ratings for --room-model/--food-model-dir')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    return parser.parse_args()
+
+
+def read_holdout(path):
+    """Read (user_id, item_id, rating) triples from a CSV or JSON lines file"""
+    triples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            item_id = row.get('item_id', row.get('room_id', row.get('recipe_id')))
+            triples.append((row['user_id'], item_id, float(row['rating'])))
+    return triples
+
+
+def rating_metrics(predict_batch, holdout):
+    """RMSE and MAE of predictions on held-out ratings"""
+    if not holdout:
+        return {'rmse': None, 'mae': None, 'n_ratings': 0}
+    users, items, actual = zip(*holdout)
+    predicted = np.asarray(predict_batch(list(users), list(items)), dtype=np.float64)
+    errors = np.asarray(actual, dtype=np.float64) - predicted
+    return {
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mae': float(np.mean(np.abs(errors))),
+        'n_ratings': len(errors)
+    }
+
+
+def ranking_metrics(recommend, holdout, k, max_users, seed, like_threshold=4.0):
+    """precision@k, recall@k and NDCG@k against held-out liked items"""
+    relevant = defaultdict(set)
+    for user_id, item_id, rating in holdout:
+        if rating >= like_threshold:
+            relevant[user_id].add(item_id)
+
+    users = sorted(relevant)
+    if len(users) > max_users:
+        rng = np.random.default_rng(seed)
+        users = [users[i] for i in sorted(rng.choice(len(users), max_users, replace=False))]
+    if not users:
+        return {'precision_at_k': None, 'recall_at_k': None, 'ndcg_at_k': None, 'k': k, 'n_users': 0}
+
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    precision, recall, ndcg = [], [], []
+    for user_id in users:
+        recommended = recommend(user_id, k)
+        hits = np.array([item_id in relevant[user_id] for item_id in recommended[:k]], dtype=np.float64)
+        n_relevant = len(relevant[user_id])
+        precision.append(hits.sum() / k)
+        recall.append(hits.sum() / n_relevant)
+        ideal = discounts[:min(n_relevant, k)].sum()
+        ndcg.append(float(hits @ discounts[:len(hits)]) / ideal)
+
+    return {
+        'precision_at_k': float(np.mean(precision)),
+        'recall_at_k': float(np.mean(recall)),
+        'ndcg_at_k': float(np.mean(ndcg)),
+        'k': k,
+        'n_users': len(users)
+    }
+
+
+def measure_latency(operation, arguments):
+    """Time one call per argument tuple; returns percentiles in milliseconds and throughput"""
+    durations = []
+    start = time.perf_counter()
+    for args in arguments:
+        call_start = time.perf_counter()
+        operation(*args)
+        durations.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    durations_ms = np.asarray(durations) * 1000.0
+    return {
+        'calls': len(durations),
+        'mean_ms': float(durations_ms.mean()),
+        'p50_ms': float(np.percentile(durations_ms, 50)),
+        'p90_ms': float(np.percentile(durations_ms, 90)),
+        'p99_ms': float(np.percentile(durations_ms, 99)),
+        'max_ms': float(durations_ms.max()),
+        'throughput_per_s': len(durations) / elapsed if elapsed > 0 else None
+    }
+
+
+def sample(values, n, rng):
+    values = list(values)
+    if not values:
+        return []
+    return [values[i] for i in rng.integers(0, len(values), n)]
+
+
+def benchmark_room(engine, holdout, args, rng):
+    known_users = engine.user_ids
+    room_ids = engine.room_ids
+    calls = args.latency_calls
+
+    def recommend(user_id, k):
+        return [rec['room_id'] for rec in engine.get_user_recommendations(user_id, n_recommendations=k)]
+
+    return {
+        'model': 'room',
+        'n_users': len(known_users),
+        'catalogue_size': len(room_ids),
+        'n_ratings': int(engine.ratings.nnz),
+        'load_time_s': engine.training_time,
+        'quality': {
+            **rating_metrics(lambda users, rooms: engine.predict_ratings_batch(users, rooms)[0], holdout),
+            **ranking_metrics(recommend, holdout, args.k, args.eval_users, args.seed)
+        },
+        'latency': {
+            'predict_rating': measure_latency(
+                engine.predict_rating, list(zip(sample(known_users, calls, rng), sample(room_ids, calls, rng)))),
+            'get_user_recommendations': measure_latency(
+                lambda user_id: engine.get_user_recommendations(user_id, n_recommendations=args.k),
+                [(user_id,) for user_id in sample(known_users, calls, rng)]),
+            'get_popular_rooms': measure_latency(engine.get_popular_rooms, [(args.k,)] * calls)
+        }
+    }
+
+
+def benchmark_food(model, holdout, args, rng):
+    user_ids = list(model.user_mappings)
+    recipe_ids = list(model.recipe_mappings)
+    calls = args.latency_calls
+
+    def recommend(user_id, k):
+        return [rec['recipe_id'] for rec in model.get_user_recommendations(user_id, recipe_ids, k)]
+
+    return {
+        'model': 'food',
+        'n_users': len(user_ids),
+        'catalogue_size': len(recipe_ids),
+        'quality': {
+            **rating_metrics(lambda users, recipes: model.predict_batch(users, recipes)[0], holdout),
+            **ranking_metrics(recommend, holdout, args.k, args.eval_users, args.seed)
+        },
+        'latency': {
+            'predict_rating': measure_latency(
+                model.predict_rating, list(zip(sample(user_ids, calls, rng), sample(recipe_ids, calls, rng)))),
+            'get_user_recommendations': measure_latency(
+                lambda user_id: model.get_user_recommendations(user_id, recipe_ids, args.k),
+                [(user_id,) for user_id in sample(user_ids, calls, rng)])
+        }
+    }
+
+
+def load_room_engine(model_path=None, model_data=None):
+    from room_model_service import RoomRecommendationEngine
+
+    engine = RoomRecommendationEngine(model_path=model_path or 'synthetic')
+    if not engine.load_model(data=model_data):
+        raise RuntimeError(f'could not load room model {model_path or "(synthetic)"}')
+    return engine
+
+
+def load_food_model(model_dir):
+    from model_service import FoodRecommendationModel
+
+    model = FoodRecommendationModel(model_dir=model_dir)
+    if not model.load_model():
+        raise RuntimeError(f'could not load food model from {model_dir}')
+    return model
+
+
+def run(args):
+    models = [name.strip() for name in args.models.split(',') if name.strip()]
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    holdout = read_holdout(args.holdout_file) if args.holdout_file else []
+    results = []
+
+    for name in models:
+        rng = np.random.default_rng(args.seed)
+        if name == 'room' and args.room_model:
+            results.append(benchmark_room(load_room_engine(model_path=args.room_model), holdout, args, rng))
+        elif name == 'food' and args.food_model_dir:
+            results.append(benchmark_food(load_food_model(args.food_model_dir), holdout, args, rng))
+        elif name == 'room':
+            for size in sizes:
+                model_data, room_holdout = make_room_model(
+                    args.users, size, args.ratings_per_user, args.components, args.holdout_fraction, args.seed)
+                engine = load_room_engine(model_data=model_data)
+                results.append(benchmark_room(engine, room_holdout, args, rng))
+        elif name == 'food':
+            for size in sizes:
+                model_data, mappings, food_holdout = make_food_model(
+                    args.users, size, args.ratings_per_user, args.components, args.holdout_fraction, args.seed)
+                with tempfile.TemporaryDirectory() as model_dir:
+                    with open(os.path.join(model_dir, 'complete_food_recommendation_model.pkl'), 'wb') as f:
+                        pickle.dump(model_data, f)
+                    with open(os.path.join(model_dir, 'recommendation_mappings.pkl'), 'wb') as f:
+                        pickle.dump(mappings, f)
+                    model = load_food_model(model_dir)
+                results.append(benchmark_food(model, food_holdout, args, rng))
+        else:
+            raise ValueError(f'unknown model: {name}')
+
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'config': vars(args),
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    # Keep stdout for the JSON report; the services print progress while loading
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(parse_args())
+    payload = json.dumps(report, indent=2)
+    output = report['config'].get('output')
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        print(f"Benchmark results written to {output}")
+    else:
+        print(payload)
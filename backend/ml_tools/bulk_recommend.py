@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Bulk top-N recommendations for many users (email campaigns, dashboard prefetch)
+Scores users in blocks with one matrix-matrix product per block and streams
+one JSON line per user: {"user_id": ..., "recommendations": [...]}.
+
+Usage:
+  python bulk_recommend.py --models room --room-model ../rooms_ml_models/room_model_artifact --all-users > rooms.jsonl
+  python bulk_recommend.py --models food --food-model-dir ../ml_models --users users.txt --n 20 --output food.jsonl
+
+--users takes a file with one user ID per line ('-' for stdin).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'rooms_ml_models'))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'ml_models'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Stream top-N recommendations for many users as JSON lines')
+    parser.add_argument('--models', choices=['room', 'food'], default='room')
+    parser.add_argument('--room-model', default=os.path.join(TOOLS_DIR, '..', 'rooms_ml_models',
+                                                             'room_recommendation_model.pkl'),
+                        help='room model .pkl or artifact directory')
+    parser.add_argument('--food-model-dir', default=os.path.join(TOOLS_DIR, '..', 'ml_models'),
+                        help='directory with the food model pickles or food_model_artifact')
+    users = parser.add_mutually_exclusive_group(required=True)
+    users.add_argument('--users', help="file with one user ID per line ('-' for stdin)")
+    users.add_argument('--all-users', action='store_true', help='every user in the model')
+    parser.add_argument('--candidates', help='food only: file with one candidate recipe ID per line')
+    parser.add_argument('--n', type=int, default=10, help='recommendations per user')
+    parser.add_argument('--block-size', type=int, default=1024, help='users scored per matrix product')
+    parser.add_argument('--output', default='-', help="JSON lines file ('-' for stdout)")
+    args = parser.parse_args()
+    if args.n < 1 or args.block_size < 1:
+        parser.error('--n and --block-size must be positive')
+    return args
+
+
+def read_ids(path):
+    if path == '-':
+        return [line.strip() for line in sys.stdin if line.strip()]
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_model(args):
+    """Return (model, all user IDs, iterator factory) for the selected service"""
+    if args.models == 'room':
+        from room_model_service import RoomRecommendationEngine
+
+        engine = RoomRecommendationEngine(model_path=args.room_model)
+        if not engine.load_model():
+            raise RuntimeError(f'could not load room model {args.room_model}')
+        return engine, list(engine.user_ids), \
+            lambda user_ids: engine.iter_recommendations_for_users(user_ids, args.n, args.block_size)
+
+    from model_service import FoodRecommendationModel
+
+    model = FoodRecommendationModel(model_dir=args.food_model_dir)
+    if not model.load_model():
+        raise RuntimeError(f'could not load food model from {args.food_model_dir}')
+    candidates = read_ids(args.candidates) if args.candidates else None
+    all_users = sorted(model.user_mappings, key=model.user_mappings.get)
+    return model, all_users, \
+        lambda user_ids: model.iter_recommendations_for_users(user_ids, candidates, args.n, args.block_size)
+
+
+def run(args, out):
+    # The services print progress while loading; keep stdout for the JSON lines
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.time()
+        _, all_users, recommend = load_model(args)
+        user_ids = all_users if args.all_users else read_ids(args.users)
+        print(f"Model loaded in {time.time() - start:.1f}s; recommending for {len(user_ids)} users")
+
+    start = time.time()
+    count = 0
+    for user_id, recommendations in recommend(user_ids):
+        out.write(json.dumps({'user_id': user_id, 'recommendations': recommendations}) + '\n')
+        count += 1
+        if count % 100000 == 0:
+            print(f"{count} users ({count / (time.time() - start):.0f} users/s)", file=sys.stderr)
+
+    elapsed = time.time() - start
+    print(f"Wrote recommendations for {count} users in {elapsed:.1f}s "
+          f"({count / max(elapsed, 1e-9):.0f} users/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.output == '-':
+        run(args, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            run(args, f)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic model files for load testing the recommendation services
+Writes room_recommendation_model.pkl and/or complete_food_recommendation_model.pkl
+plus recommendation_mappings.pkl with the exact schema the services load.
+
+Usage:
+  python generate_synthetic_models.py --users 1000000 --items 50000 --out-dir /data/synthetic
+  python generate_synthetic_models.py --models room --users 100000 --items 5000 --artifacts
+
+Point the services at the output with ROOM_MODEL_PATH=<out-dir>/room_recommendation_model.pkl
+(or the room_model_artifact directory) and FOOD_MODEL_ARTIFACT=<out-dir>/food_model_artifact.
+"""
+
+import os
+import sys
+import csv
+import time
+import pickle
+import argparse
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'rooms_ml_models'))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'ml_models'))
+sys.path.insert(0, TOOLS_DIR)
+
+from synthetic_data import make_room_model, make_food_model
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic recommendation models')
+    parser.add_argument('--models', default='room,food', help='comma-separated: room, food')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=5000, help='rooms / recipes in the catalogue')
+    parser.add_argument('--ratings-per-user', type=int, default=20, help='mean ratings per user (Poisson)')
+    parser.add_argument('--components', type=int, default=50, help='SVD latent factors')
+    parser.add_argument('--svd-iter', type=int, default=5, help='TruncatedSVD power iterations')
+    parser.add_argument('--holdout-fraction', type=float, default=0.0,
+                        help='ratings held out of training and written to <model>_holdout.csv')
+    parser.add_argument('--artifacts', action='store_true',
+                        help='also write the memory-mapped artifact directories')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out-dir', default='synthetic_models')
+    return parser.parse_args()
+
+
+def write_pickle(path, data):
+    start = time.time()
+    with open(path, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"  wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB in {time.time() - start:.1f}s)")
+
+
+def write_holdout(path, holdout):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['user_id', 'item_id', 'rating'])
+        writer.writerows(holdout)
+    print(f"  wrote {path} ({len(holdout)} held-out ratings)")
+
+
+def generate_room(args):
+    from room_model_service import RoomRecommendationEngine
+
+    start = time.time()
+    model_data, holdout = make_room_model(
+        args.users, args.items, args.ratings_per_user, args.components, args.holdout_fraction, args.seed,
+        args.svd_iter)
+    print(f"Room model generated in {time.time() - start:.1f}s "
+          f"({args.users} users x {args.items} rooms, {model_data['user_room_matrix'].sparse.density:.2e} density)")
+
+    model_path = os.path.join(args.out_dir, 'room_recommendation_model.pkl')
+    write_pickle(model_path, model_data)
+    if holdout:
+        write_holdout(os.path.join(args.out_dir, 'room_holdout.csv'), holdout)
+
+    if args.artifacts:
+        engine = RoomRecommendationEngine(model_path=model_path)
+        if engine.load_model(data=model_data):
+            engine.save_artifact(os.path.join(args.out_dir, 'room_model_artifact'))
+            print(f"  wrote {os.path.join(args.out_dir, 'room_model_artifact')}")
+
+
+def generate_food(args):
+    from model_service import FoodRecommendationModel
+
+    start = time.time()
+    model_data, mappings, holdout = make_food_model(
+        args.users, args.items, args.ratings_per_user, args.components, args.holdout_fraction, args.seed,
+        args.svd_iter)
+    print(f"Food model generated in {time.time() - start:.1f}s ({args.users} users x {args.items} recipes)")
+
+    write_pickle(os.path.join(args.out_dir, 'complete_food_recommendation_model.pkl'), model_data)
+    write_pickle(os.path.join(args.out_dir, 'recommendation_mappings.pkl'), mappings)
+    if holdout:
+        write_holdout(os.path.join(args.out_dir, 'food_holdout.csv'), holdout)
+
+    if args.artifacts:
+        model = FoodRecommendationModel(model_dir=args.out_dir)
+        if model.load_model(use_artifact=False):
+            model.save_artifact(model.artifact_dir)
+            print(f"  wrote {model.artifact_dir}")
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    generators = {'room': generate_room, 'food': generate_food}
+    for name in [name.strip() for name in args.models.split(',') if name.strip()]:
+        if name not in generators:
+            print(f"Unknown model: {name}")
+            sys.exit(1)
+        generators[name](args)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Offline top-K recommendation precomputation for every model user
+Shards the users across a process pool. Workers memory-map the model artifact
+(one page-cached copy of the factors, nothing pickled per task) and write
+their rows straight into memory-mapped items.npy / scores.npy output arrays.
+The services serve the result with ROOM_PRECOMPUTED_TOPK / FOOD_PRECOMPUTED_TOPK.
+
+Usage:
+  python precompute_recommendations.py --models room --room-model ../rooms_ml_models/room_model_artifact --output room_topk
+  python precompute_recommendations.py --models food --food-model-dir ../ml_models --workers 8 --k 100 --output food_topk
+
+A .pkl model is converted to a temporary artifact first so workers can map it.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import contextlib
+import multiprocessing
+
+import numpy as np
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'rooms_ml_models'))
+sys.path.insert(0, os.path.join(TOOLS_DIR, '..', 'ml_models'))
+
+# Must match TOPK_FORMAT in room_model_service.py and model_service.py
+TOPK_FORMAT = 'topk-recommendations/1'
+BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+# Per-worker state set by _init_worker: (models, model, items, scores, k, block size, food plan)
+_worker = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Precompute top-K recommendations for every user')
+    parser.add_argument('--models', choices=['room', 'food'], default='room')
+    parser.add_argument('--room-model', default=os.path.join(TOOLS_DIR, '..', 'rooms_ml_models',
+                                                             'room_recommendation_model.pkl'),
+                        help='room model .pkl or artifact directory')
+    parser.add_argument('--food-model-dir', default=os.path.join(TOOLS_DIR, '..', 'ml_models'),
+                        help='directory with the food model pickles or food_model_artifact')
+    parser.add_argument('--output', required=True, help='top-K directory to write')
+    parser.add_argument('--k', type=int, default=50, help='recommendations kept per user')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--shards', type=int, help='user shards (default: 4 per worker)')
+    parser.add_argument('--block-size', type=int, default=1024, help='users scored per matrix product')
+    parser.add_argument('--blas-threads', type=int, default=1,
+                        help='BLAS threads per worker (1 keeps workers from oversubscribing cores)')
+    return parser.parse_args()
+
+
+def load_model(models, path, evaluate=False):
+    """Load the room engine or food model from path (room .pkl/artifact, food model directory or artifact)"""
+    if models == 'room':
+        from room_model_service import RoomRecommendationEngine
+
+        engine = RoomRecommendationEngine(model_path=path, evaluate_on_load=evaluate)
+        if not engine.load_model():
+            raise RuntimeError(f'could not load room model {path}')
+        return engine
+
+    from model_service import FoodRecommendationModel
+
+    if os.path.exists(os.path.join(path, 'manifest.json')):
+        model = FoodRecommendationModel(artifact_dir=path)
+    else:
+        model = FoodRecommendationModel(model_dir=path)
+    if not model.load_model() or model.user_factors is None:
+        raise RuntimeError(f'could not load food model factors from {path}')
+    return model
+
+
+def model_artifact(args, model, work_dir):
+    """Artifact directory the workers map, writing one from the loaded model if it came from pickles"""
+    if args.models == 'room':
+        if os.path.isdir(args.room_model):
+            return args.room_model
+    elif getattr(model, 'artifact_dir', None) and os.path.isdir(model.artifact_dir):
+        # load_model opens the artifact directory whenever it exists
+        return model.artifact_dir
+
+    artifact_dir = os.path.join(work_dir, 'model_artifact')
+    model.save_artifact(artifact_dir)
+    return artifact_dir
+
+
+def _init_worker(models, artifact_dir, output_dir, k, block_size):
+    global _worker
+    with contextlib.redirect_stdout(sys.stderr):
+        model = load_model(models, artifact_dir)
+    items = np.load(os.path.join(output_dir, 'items.npy'), mmap_mode='r+')
+    scores = np.load(os.path.join(output_dir, 'scores.npy'), mmap_mode='r+')
+    # Food: resolve the whole catalogue once per worker
+    plan = model._candidate_plan(None) if models == 'food' else None
+    _worker = (models, model, items, scores, k, block_size, plan)
+
+
+def _run_shard(shard):
+    """Score one contiguous range of user rows into the output arrays; returns its timing"""
+    index, start, stop = shard
+    models, model, items, scores, k, block_size, plan = _worker
+    started = time.time()
+
+    for block_start in range(start, stop, block_size):
+        rows = np.arange(block_start, min(block_start + block_size, stop))
+        if models == 'room':
+            for row, (top, raw_scores) in zip(rows.tolist(), model._rank_user_block(rows, k)):
+                items[row, :len(top)] = top
+                scores[row, :len(top)] = raw_scores
+        else:
+            top, top_scores = model._score_block(rows, plan, min(k, len(plan[0])))
+            items[rows, :top.shape[1]] = top
+            scores[rows, :top.shape[1]] = top_scores
+
+    items.flush()
+    scores.flush()
+    seconds = time.time() - started
+    return {
+        'shard': index,
+        'users': stop - start,
+        'seconds': round(seconds, 3),
+        'users_per_second': round((stop - start) / max(seconds, 1e-9), 1),
+        'pid': os.getpid()
+    }
+
+
+def shard_ranges(n_users, n_shards):
+    """Split user rows 0..n_users into n_shards contiguous (index, start, stop) ranges"""
+    n_shards = max(1, min(n_shards, n_users))
+    bounds = np.linspace(0, n_users, n_shards + 1).astype(np.int64)
+    return [(i, int(bounds[i]), int(bounds[i + 1])) for i in range(n_shards)]
+
+
+def run(args):
+    output_dir = os.path.abspath(args.output)
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    try:
+        # The services print progress while loading; keep it with the job's own reporting
+        with contextlib.redirect_stdout(sys.stderr):
+            start = time.time()
+            model = load_model(args.models, args.room_model if args.models == 'room' else args.food_model_dir)
+            artifact_dir = model_artifact(args, model, tmp_dir)
+        fingerprint = model.factor_fingerprint()
+        n_users, n_items = fingerprint['n_users'], fingerprint['n_items']
+        k = min(args.k, n_items)
+        del model
+        print(f"Model loaded in {time.time() - start:.1f}s: {n_users} users x {n_items} items, top {k}",
+              file=sys.stderr)
+
+        # Preallocate the outputs; workers map them and fill their own rows
+        np.lib.format.open_memmap(os.path.join(tmp_dir, 'items.npy'), mode='w+', dtype=np.int32,
+                                  shape=(n_users, k))[:] = -1
+        np.lib.format.open_memmap(os.path.join(tmp_dir, 'scores.npy'), mode='w+', dtype=np.float32,
+                                  shape=(n_users, k))[:] = np.nan
+
+        shards = shard_ranges(n_users, args.shards or args.workers * 4)
+        workers = max(1, min(args.workers, len(shards)))
+        # Spawned workers inherit this environment before they import NumPy
+        for name in BLAS_THREAD_VARIABLES:
+            os.environ[name] = str(args.blas_threads)
+
+        start = time.time()
+        # spawn: workers start clean and map the artifact instead of inheriting a forked heap
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(args.models, artifact_dir, tmp_dir, k, args.block_size)) as pool:
+            timings = []
+            for timing in pool.imap_unordered(_run_shard, shards):
+                timings.append(timing)
+                print(f"shard {timing['shard']:>4}  users {timing['users']:>9}  {timing['seconds']:>8.2f}s  "
+                      f"{timing['users_per_second']:>10.0f} users/s  pid {timing['pid']}", file=sys.stderr)
+        elapsed = time.time() - start
+
+        shutil.rmtree(os.path.join(tmp_dir, 'model_artifact'), ignore_errors=True)
+        timings.sort(key=lambda timing: timing['shard'])
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': TOPK_FORMAT,
+                'model': args.models,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'k': k,
+                'n_users': n_users,
+                'n_items': n_items,
+                'fingerprint': fingerprint,
+                'workers': workers,
+                'seconds': round(elapsed, 3),
+                'shards': timings
+            }, f, indent=2)
+
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        os.replace(tmp_dir, output_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"Wrote top-{k} for {n_users} users to {output_dir} in {elapsed:.1f}s "
+          f"({n_users / max(elapsed, 1e-9):.0f} users/s, {workers} workers, {len(shards)} shards)",
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Synthetic interaction data and models for the room and food recommenders
+Builds model components with the same layout the services load, plus
+held-out ratings for offline evaluation
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+
+HOTELS = ['City Hotel', 'Resort Hotel']
+ROOM_TYPES = list('ABCDEFGH')
+PRICE_CATEGORIES = ['Low', 'Medium', 'High']
+
+
+def sample_ratings(n_users, n_items, ratings_per_user, n_latent=10, seed=42, block_size=100000):
+    """Sample a sparse 1-5 rating matrix from a hidden low-rank preference model.
+
+    Returns a CSR matrix (users x items) with roughly ratings_per_user
+    entries per user; item popularity follows a Zipf-like curve. Users are
+    generated in blocks so peak memory stays proportional to the number of
+    ratings rather than users x items.
+    """
+    rng = np.random.default_rng(seed)
+    item_traits = rng.normal(0.0, 1.0, (n_items, n_latent)).astype(np.float32)
+    item_quality = rng.normal(0.0, 0.5, n_items).astype(np.float32)
+
+    popularity = 1.0 / np.arange(1, n_items + 1) ** 0.8
+    popularity = rng.permutation(popularity / popularity.sum())
+    cumulative = np.cumsum(popularity)
+
+    indptr = [np.zeros(1, dtype=np.int64)]
+    indices, data = [], []
+    offset = 0
+    for start in range(0, n_users, block_size):
+        stop = min(start + block_size, n_users)
+        user_taste = rng.normal(0.0, 1.0, (stop - start, n_latent)).astype(np.float32)
+        per_user = np.clip(rng.poisson(ratings_per_user, stop - start), 1, n_items)
+        rows = np.repeat(np.arange(stop - start), per_user)
+        cols = np.minimum(np.searchsorted(cumulative, rng.random(len(rows))), n_items - 1)
+
+        affinity = np.einsum('ij,ij->i', user_taste[rows], item_traits[cols]) / np.sqrt(n_latent)
+        values = np.clip(np.rint(3.5 + affinity + item_quality[cols] + rng.normal(0.0, 0.5, len(rows))), 1, 5)
+
+        block = sparse.csr_matrix((values.astype(np.float32), (rows, cols)), shape=(stop - start, n_items))
+        # Duplicate (user, item) draws were summed; keep them on the rating scale
+        block.data = np.clip(block.data, 1, 5)
+        block.sort_indices()
+        indptr.append(block.indptr[1:].astype(np.int64) + offset)
+        indices.append(block.indices)
+        data.append(block.data)
+        offset += block.nnz
+
+    return sparse.csr_matrix(
+        (np.concatenate(data), np.concatenate(indices), np.concatenate(indptr)), shape=(n_users, n_items))
+
+
+def split_holdout(ratings, holdout_fraction=0.2, seed=42):
+    """Split a CSR rating matrix into (train CSR, held-out (rows, cols, values))"""
+    if holdout_fraction <= 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return ratings, (empty, empty, np.zeros(0, dtype=ratings.dtype))
+
+    rng = np.random.default_rng(seed)
+    coo = ratings.tocoo()
+    held_out = rng.random(coo.nnz) < holdout_fraction
+    train = sparse.csr_matrix(
+        (coo.data[~held_out], (coo.row[~held_out], coo.col[~held_out])), shape=ratings.shape)
+    train.sort_indices()
+    return train, (coo.row[held_out], coo.col[held_out], coo.data[held_out])
+
+
+def fit_truncated_svd(train, n_components=25, seed=42, n_iter=5):
+    """Fit TruncatedSVD the way the training notebooks do; returns (svd, user_factors, item_factors)
+
+    n_iter trades factor quality for speed on very large matrices.
+    """
+    n_components = max(1, min(n_components, min(train.shape) - 1))
+    svd = TruncatedSVD(n_components=n_components, n_iter=n_iter, random_state=seed)
+    user_factors = svd.fit_transform(train)
+    return svd, user_factors, svd.components_.T
+
+
+def make_room_features(room_ids, train, seed=42):
+    """Room metadata frame with the columns the room service reads"""
+    rng = np.random.default_rng(seed)
+    n_rooms = len(room_ids)
+    adr = rng.gamma(4.0, 30.0, n_rooms).round(2)
+    price_category = pd.cut(adr, bins=[-np.inf, *np.quantile(adr, [1 / 3, 2 / 3]), np.inf],
+                            labels=PRICE_CATEGORIES).astype(str)
+
+    counts = np.diff(train.tocsc().indptr)
+    sums = np.asarray(train.sum(axis=0)).ravel()
+    rating = np.full(n_rooms, 3.5)
+    np.divide(sums, counts, out=rating, where=counts > 0)
+
+    return pd.DataFrame({
+        'hotel': rng.choice(HOTELS, n_rooms),
+        'assigned_room_type': rng.choice(ROOM_TYPES, n_rooms),
+        'adr': adr,
+        'price_category': price_category,
+        'rating': rating.round(2)
+    }, index=room_ids)
+
+
+def make_room_model(n_users, n_rooms, ratings_per_user=20, n_components=25, holdout_fraction=0.2, seed=42,
+                    n_iter=5):
+    """Synthetic room model in the room_recommendation_model.pkl layout.
+
+    Returns (model_data, holdout) where holdout is a list of
+    (user_id, room_id, rating) triples not seen by the model.
+    """
+    ratings = sample_ratings(n_users, n_rooms, ratings_per_user, seed=seed)
+    train, (rows, cols, values) = split_holdout(ratings, holdout_fraction, seed)
+    svd, user_factors, room_factors = fit_truncated_svd(train, n_components, seed, n_iter)
+
+    user_ids = [f'user_{i}' for i in range(n_users)]
+    room_ids = [f'room_{j}' for j in range(n_rooms)]
+    train_counts = np.diff(train.indptr)
+    train_sums = np.asarray(train.sum(axis=1)).ravel()
+
+    model_data = {
+        'svd_model': svd,
+        'user_factors': user_factors,
+        'room_factors': room_factors,
+        'user_room_matrix': pd.DataFrame.sparse.from_spmatrix(train, index=user_ids, columns=room_ids),
+        'room_features': make_room_features(room_ids, train, seed),
+        'user_profiles': {
+            user_ids[i]: {
+                'total_bookings': int(train_counts[i]),
+                'avg_rating': float(train_sums[i] / train_counts[i]) if train_counts[i] else 0.0
+            } for i in range(n_users)
+        }
+    }
+    holdout = [(user_ids[r], room_ids[c], float(v)) for r, c, v in zip(rows, cols, values)]
+    return model_data, holdout
+
+
+def make_food_model(n_users, n_recipes, ratings_per_user=20, n_components=25, holdout_fraction=0.2, seed=42,
+                    n_iter=5):
+    """Synthetic food model in the complete_food_recommendation_model.pkl / recommendation_mappings.pkl layout.
+
+    Returns (model_data, mappings, holdout). The factors come from TruncatedSVD
+    on mean-centered observed ratings, so predictions are global_mean + u . v.
+    """
+    ratings = sample_ratings(n_users, n_recipes, ratings_per_user, seed=seed + 1)
+    train, (rows, cols, values) = split_holdout(ratings, holdout_fraction, seed)
+    global_mean = float(train.data.mean())
+
+    centered = train.copy()
+    centered.data = centered.data - global_mean
+    _, user_factors, recipe_factors = fit_truncated_svd(centered, n_components, seed, n_iter)
+
+    user_ids = [str(100000 + i) for i in range(n_users)]
+    recipe_ids = [str(500000 + j) for j in range(n_recipes)]
+
+    model_data = {
+        'model': {
+            'algorithm': 'TruncatedSVD',
+            'user_factors': user_factors.astype(np.float32),
+            'recipe_factors': recipe_factors.astype(np.float32),
+            'mean_centered': True
+        },
+        'global_mean': global_mean
+    }
+    mappings = {
+        'user_mappings': {user_id: i for i, user_id in enumerate(user_ids)},
+        'recipe_mappings': {recipe_id: j for j, recipe_id in enumerate(recipe_ids)}
+    }
+    holdout = [(user_ids[r], recipe_ids[c], float(v)) for r, c, v in zip(rows, cols, values)]
+    return model_data, mappings, holdout
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) variant of the room recommendation API
+Serves /predict, /recommendations and /popular from an asyncio event loop.
+Concurrent /predict and /recommendations requests that arrive within a short
+window are micro-batched into one vectorized call on the engine.
+
+Usage: python async_room_service.py   (requires uvicorn)
+"""
+
+import os
+import sys
+from collections import defaultdict
+
+# Set UTF-8 encoding for Windows
+if sys.platform == "win32":
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+import room_model_service as service
+# Shared with the food service; room_model_service puts ml_common on sys.path
+from asgi_service import AsyncJSONApp, MicroBatcher
+
+# Requests are coalesced until MAX_BATCH_SIZE arrive or MAX_WAIT_MS elapses
+MAX_BATCH_SIZE = int(os.environ.get('ROOM_ASYNC_MAX_BATCH', 256))
+MAX_WAIT_MS = float(os.environ.get('ROOM_ASYNC_MAX_WAIT_MS', 2))
+SCORING_THREADS = int(os.environ.get('ROOM_ASYNC_SCORING_THREADS', 2))
+
+
+def predict_batch(items):
+    """items: (user_id, room_id) pairs -> (predicted_rating, confidence) per pair"""
+    model = service.room_recommendation_model
+    predictions, confidences = model.predict_ratings_batch(
+        [user_id for user_id, _ in items], [room_id for _, room_id in items])
+    return list(zip(predictions.tolist(), confidences))
+
+
+def recommend_batch(items):
+    """items: (user_id, n_recommendations) -> recommendation list per item"""
+    model = service.room_recommendation_model
+    results = [None] * len(items)
+
+    # One matrix-matrix scoring call per distinct N in the window
+    by_count = defaultdict(list)
+    for position, (user_id, n_recommendations) in enumerate(items):
+        by_count[n_recommendations].append(position)
+    for n_recommendations, positions in by_count.items():
+        batch = model.get_recommendations_for_users([items[i][0] for i in positions], n_recommendations)
+        for position, recommendations in zip(positions, batch):
+            results[position] = recommendations
+    return results
+
+
+class AsyncRoomRecommendationApp(AsyncJSONApp):
+    """Minimal ASGI application exposing the room recommendation routes"""
+
+    def __init__(self):
+        super().__init__(SCORING_THREADS)
+        self.predict_batcher = MicroBatcher(predict_batch, self.executor, MAX_BATCH_SIZE, MAX_WAIT_MS / 1000.0)
+        self.recommend_batcher = MicroBatcher(recommend_batch, self.executor, MAX_BATCH_SIZE, MAX_WAIT_MS / 1000.0)
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('POST', '/predict'): self.predict,
+            ('POST', '/recommendations'): self.recommendations,
+            ('GET', '/popular'): self.popular
+        }
+
+    async def startup(self):
+        if await self.run_blocking(service.room_recommendation_model.load_model):
+            print("Room model loaded successfully on startup")
+        else:
+            print("Room model not loaded on startup")
+
+    async def health(self, data, query):
+        model = service.room_recommendation_model
+        return 200, {
+            'status': 'healthy',
+            'service': 'room_recommendation_service',
+            'mode': 'async',
+            'model_loaded': model.model_loaded,
+            'model_ready': model.model_ready,
+            'model_version': model.model_version,
+            'predict_batching': self.predict_batcher.stats(),
+            'recommendation_batching': self.recommend_batcher.stats()
+        }
+
+    async def predict(self, data, query):
+        user_id = data.get('user_id')
+        room_id = data.get('room_id')
+        if not user_id or not room_id:
+            return 400, {'error': 'user_id and room_id required'}
+
+        prediction, confidence = await self.predict_batcher.submit((user_id, room_id))
+        return 200, {
+            'success': True,
+            'user_id': user_id,
+            'room_id': room_id,
+            'predicted_rating': prediction,
+            'confidence': confidence
+        }
+
+    async def recommendations(self, data, query):
+        try:
+            user_id, candidate_rooms, n_recommendations, filters = service.parse_recommendation_request(data)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        if candidate_rooms or filters:
+            # Constrained requests score their own eligible rooms instead of joining a batch
+            recommendations = await self.run_blocking(
+                service.room_recommendation_model.get_user_recommendations,
+                user_id, candidate_rooms, n_recommendations, filters)
+        else:
+            recommendations = await self.recommend_batcher.submit((user_id, n_recommendations))
+        return 200, {
+            'success': True,
+            'user_id': user_id,
+            'recommendations': recommendations,
+            'total_candidates': len(candidate_rooms),
+            'returned_count': len(recommendations)
+        }
+
+    async def popular(self, data, query):
+        try:
+            count = int(query.get('count', ['10'])[0])
+        except ValueError:
+            return 400, {'error': 'count must be an integer'}
+        try:
+            filters = service.room_filters({key: values[0] for key, values in query.items()})
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        popular_rooms = await self.run_blocking(service.room_recommendation_model.get_popular_rooms, count, filters)
+        return 200, {
+            'success': True,
+            'popular_rooms': popular_rooms,
+            'count': len(popular_rooms)
+        }
+
+
+app = AsyncRoomRecommendationApp()
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required for the async service: pip install uvicorn")
+        sys.exit(1)
+
+    # Change to script directory so the default model path resolves
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    print("Starting async Room Recommendation Model Service on port 5002...")
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('ROOM_SERVICE_PORT', 5002)), log_level='warning')
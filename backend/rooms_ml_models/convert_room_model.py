@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Convert a pickled room recommendation model into the memory-mapped artifact format
+Usage: python convert_room_model.py [room_recommendation_model.pkl] [room_model_artifact]
+"""
+
+import sys
+import os
+
+# Set UTF-8 encoding for Windows
+if sys.platform == "win32":
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Change to script directory
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+from room_model_service import RoomRecommendationEngine
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else 'room_recommendation_model.pkl'
+    target = sys.argv[2] if len(sys.argv) > 2 else 'room_model_artifact'
+
+    engine = RoomRecommendationEngine(model_path=source)
+    if not engine.load_model():
+        print(f"Could not load room model from {source}")
+        sys.exit(1)
+
+    engine.save_artifact(target)
+    print(f"Room model artifact written to {target}")
+    print(f"Start the service with ROOM_MODEL_PATH={os.path.abspath(target)}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Approximate maximum-inner-product index over room factors
+Pure NumPy inverted-file (IVF) index used for top-N room retrieval
+"""
+
+import numpy as np
+
+
+class IVFInnerProductIndex:
+    """Inverted-file index for maximum inner product search.
+
+    Items are augmented with an extra coordinate sqrt(M^2 - ||x||^2) so that
+    inner-product ranking becomes nearest-neighbour ranking, then clustered
+    with k-means. A query scores the centroids, probes the n_probe best lists
+    and returns the item positions found there. Exact scoring of those
+    candidates is left to the caller.
+
+    n_probe is the recall/latency knob: probing every list is exact.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, max_iter=15, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.max_iter = max_iter
+        self.seed = seed
+
+        self.centroids = None
+        self.list_items = None
+        self.list_offsets = None
+        self.n_items = 0
+
+    def build(self, item_factors):
+        """Cluster the item factors into inverted lists"""
+        items = np.asarray(item_factors, dtype=np.float32)
+        self.n_items = len(items)
+        if self.n_items == 0:
+            raise ValueError('cannot build an index without items')
+
+        n_lists = self.n_lists or int(np.sqrt(self.n_items))
+        n_lists = max(1, min(n_lists, self.n_items))
+
+        # MIPS -> nearest neighbour reduction
+        norms_sq = np.einsum('ij,ij->i', items, items)
+        extra = np.sqrt(np.maximum(norms_sq.max() - norms_sq, 0.0))
+        augmented = np.hstack([items, extra[:, None]]).astype(np.float32)
+
+        assignments, centroids = self._kmeans(augmented, n_lists)
+
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_lists)
+        self.list_items = order.astype(np.int64)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        # Queries carry a zero in the extra coordinate, so it drops out of the scores
+        self.centroids = np.ascontiguousarray(centroids[:, :-1])
+        self.n_lists = n_lists
+        return self
+
+    def _kmeans(self, points, n_clusters):
+        """Lloyd's k-means; returns (assignments, centroids)"""
+        rng = np.random.default_rng(self.seed)
+        centroids = points[rng.choice(len(points), n_clusters, replace=False)].copy()
+        point_norms = np.einsum('ij,ij->i', points, points)
+        assignments = None
+
+        for _ in range(self.max_iter):
+            centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+            distances = point_norms[:, None] - 2.0 * (points @ centroids.T) + centroid_norms[None, :]
+            new_assignments = distances.argmin(axis=1)
+            if assignments is not None and np.array_equal(new_assignments, assignments):
+                break
+            assignments = new_assignments
+
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, points)
+            counts = np.bincount(assignments, minlength=n_clusters)
+            non_empty = counts > 0
+            centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+            # Re-seed empty clusters with random points
+            empty = np.flatnonzero(~non_empty)
+            if len(empty) > 0:
+                centroids[empty] = points[rng.choice(len(points), len(empty), replace=False)]
+
+        return assignments, centroids
+
+    def candidates(self, query, n_probe=None):
+        """Return item positions in the n_probe lists closest to the query, sorted"""
+        n_probe = self.n_probe if n_probe is None else n_probe
+        if n_probe >= self.n_lists:
+            return np.arange(self.n_items)
+
+        centroid_scores = self.centroids @ np.asarray(query)
+        probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        items = np.concatenate([
+            self.list_items[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probed
+        ])
+        items.sort()
+        return items
+
+    def stats(self):
+        sizes = np.diff(self.list_offsets) if self.list_offsets is not None else np.array([0])
+        return {
+            'type': 'ivf_inner_product',
+            'n_items': int(self.n_items),
+            'n_lists': int(self.n_lists or 0),
+            'n_probe': int(self.n_probe),
+            'max_list_size': int(sizes.max())
+        }
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Columnar room metadata for the room recommendation service
+Compiles the room_features frame into aligned NumPy columns once at load time
+so recommendation results are enriched with array gathers.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Categorical columns (dictionary-encoded) and the value used when a room lacks them
+CATEGORICAL_COLUMNS = (('hotel', 'Unknown'), ('assigned_room_type', 'Standard'), ('price_category', 'Medium'))
+NUMERIC_COLUMNS = (('adr', 100.0), ('rating', 3.5))
+
+# Request filter names for the categorical columns, and the price band bounds on adr
+FILTER_COLUMNS = {'hotel': 'hotel', 'room_type': 'assigned_room_type', 'price_category': 'price_category'}
+PRICE_FILTERS = ('min_price', 'max_price')
+
+
+class RoomFeatureStore:
+    """Room metadata as aligned per-row NumPy columns.
+
+    Rows follow the room_features index. Categorical columns are stored as
+    int32 codes into a label array whose last entry is the column default, so
+    missing values and missing columns need no special casing. room_rows maps
+    each model room position to its feature row (-1 when the room has no
+    features), so the metadata for a ranked list of positions is one
+    fancy-index gather per column.
+
+    Popularity rankings (rows by descending rating, ties in feature order)
+    are precomputed globally and per category of every filter column, so a
+    filtered top N is a slice rather than a sort.
+    """
+
+    def __init__(self, room_features, room_ids):
+        self.feature_room_ids = room_features.index.tolist()
+        self.row_index = {room_id: row for row, room_id in enumerate(self.feature_room_ids)}
+        self.room_rows = np.fromiter((self.row_index.get(room_id, -1) for room_id in room_ids),
+                                     dtype=np.int64, count=len(room_ids))
+        n_rows = len(self.feature_room_ids)
+
+        self.codes = {}
+        self.labels = {}
+        for name, default in CATEGORICAL_COLUMNS:
+            if name in room_features.columns:
+                categorical = pd.Categorical(room_features[name])
+                labels = categorical.categories.tolist()
+                if name == 'price_category':
+                    labels = [str(label) for label in labels]
+                codes = np.asarray(categorical.codes, dtype=np.int32).copy()
+                codes[codes < 0] = len(labels)
+            else:
+                labels = []
+                codes = np.zeros(n_rows, dtype=np.int32)
+            self.labels[name] = np.array(labels + [default], dtype=object)
+            self.codes[name] = codes
+
+        self.numeric = {}
+        for name, default in NUMERIC_COLUMNS:
+            if name in room_features.columns:
+                self.numeric[name] = room_features[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                self.numeric[name] = np.full(n_rows, default)
+
+        self.ratings = self.numeric['rating']
+        self._build_rankings()
+
+    def _build_rankings(self):
+        # Stable descending sort keeps DataFrame.nlargest tie order; unrated rooms are left out
+        rated = np.flatnonzero(~np.isnan(self.ratings))
+        self.popular_order = rated[np.argsort(-self.ratings[rated], kind='stable')]
+        # Rank of every row in popular_order (unrated rows rank last)
+        self.popular_rank = np.full(len(self.ratings), len(self.popular_order), dtype=np.int64)
+        self.popular_rank[self.popular_order] = np.arange(len(self.popular_order))
+
+        # Per category: the global order restricted to that category, split at category boundaries
+        self.popular_by = {}
+        for name, codes in self.codes.items():
+            by_code = np.argsort(codes[self.popular_order], kind='stable')
+            grouped = self.popular_order[by_code]
+            bounds = np.searchsorted(codes[grouped], np.arange(len(self.labels[name]) + 1))
+            self.popular_by[name] = [grouped[bounds[code]:bounds[code + 1]] for code in range(len(self.labels[name]))]
+
+    def _label_code(self, name, label):
+        """Code of a category label (compared as text, since filters arrive as strings), or None"""
+        for code, value in enumerate(self.labels[name]):
+            if value == label or str(value) == str(label):
+                return code
+        return None
+
+    def _conditions(self, filters):
+        """Category filters as (column, code) pairs, or None when a label matches no room"""
+        conditions = []
+        for key, label in (filters or {}).items():
+            if key in FILTER_COLUMNS:
+                code = self._label_code(FILTER_COLUMNS[key], label)
+                if code is None:
+                    return None
+                conditions.append((FILTER_COLUMNS[key], code))
+        return conditions
+
+    def _apply_price_band(self, rows, filters):
+        prices = self.numeric['adr'][rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if filters.get('min_price') is not None:
+            keep &= prices >= filters['min_price']
+        if filters.get('max_price') is not None:
+            keep &= prices <= filters['max_price']
+        return keep
+
+    def filter_mask(self, rows, filters):
+        """Boolean mask of the feature rows (-1 for rooms without features) that satisfy filters"""
+        mask = rows >= 0
+        conditions = self._conditions(filters)
+        if conditions is None:
+            return np.zeros(len(rows), dtype=bool)
+        safe_rows = np.where(mask, rows, 0)
+        for name, code in conditions:
+            mask &= self.codes[name][safe_rows] == code
+        return mask & self._apply_price_band(safe_rows, filters)
+
+    def popular_rows(self, top_n, filters=None, rows=None):
+        """Feature rows of the top_n highest rated rooms matching filters.
+
+        filters maps filter names (hotel, room_type, price_category,
+        min_price, max_price) to values. rows optionally restricts the
+        ranking to those feature rows (e.g. a request's candidate rooms).
+        """
+        filters = filters or {}
+        conditions = self._conditions(filters)
+        if top_n <= 0 or conditions is None:
+            return np.empty(0, dtype=np.int64)
+
+        if rows is not None:
+            # Candidate rooms: keep the matching rated rows and order them by precomputed rank
+            rows = np.unique(rows[rows >= 0])
+            rows = rows[self.filter_mask(rows, filters) & (self.popular_rank[rows] < len(self.popular_order))]
+            return rows[np.argsort(self.popular_rank[rows], kind='stable')][:top_n]
+
+        if conditions:
+            # Start from the smallest matching ranking and keep the rows satisfying the other filters
+            conditions.sort(key=lambda condition: len(self.popular_by[condition[0]][condition[1]]))
+            ranked = self.popular_by[conditions[0][0]][conditions[0][1]]
+            for name, code in conditions[1:]:
+                ranked = ranked[self.codes[name][ranked] == code]
+        else:
+            ranked = self.popular_order
+
+        if any(filters.get(key) is not None for key in PRICE_FILTERS):
+            ranked = ranked[self._apply_price_band(ranked, filters)]
+        return ranked[:top_n]
+
+    def __len__(self):
+        return len(self.feature_room_ids)
+
+    def rows_for_positions(self, positions):
+        """Feature rows for model room positions (-1 where a room has no features)"""
+        return self.room_rows[positions]
+
+    def rows_for_ids(self, room_ids):
+        """Feature rows for room IDs (-1 where a room has no features)"""
+        return np.fromiter((self.row_index.get(room_id, -1) for room_id in room_ids),
+                           dtype=np.int64, count=len(room_ids))
+
+    def rating(self, room_id, default=3.5):
+        """Average rating of a room, or default when it has none"""
+        row = self.row_index.get(room_id)
+        if row is None or np.isnan(self.ratings[row]):
+            return default
+        return float(self.ratings[row])
+
+    def column(self, name, rows):
+        """Decoded values of one column for feature rows, as a list"""
+        if name in self.codes:
+            return self.labels[name][self.codes[name][rows]].tolist()
+        return self.numeric[name][rows].tolist()
+
+    def metadata(self, rows):
+        """Recommendation metadata dicts for feature rows (all rows must be >= 0)"""
+        return [
+            {'hotel': hotel, 'room_type': room_type, 'price': price, 'price_category': price_category,
+             'avg_rating': rating}
+            for hotel, room_type, price, price_category, rating in zip(
+                self.column('hotel', rows),
+                self.column('assigned_room_type', rows),
+                self.column('adr', rows),
+                self.column('price_category', rows),
+                self.column('rating', rows)
+            )
+        ]
@@ -6,14 +6,24 @@ Flask API for real-time room recommendations using trained SVD model
 
 import os
 import sys
+import json
+import shutil
 import pickle
 import numpy as np
 import pandas as pd
-from flask import Flask, request, jsonify
+from scipy import sparse
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import logging
-from sklearn.metrics import mean_squared_error, mean_absolute_error
 import time
+import threading
+from collections import OrderedDict, namedtuple
+from room_ann_index import IVFInnerProductIndex
+from room_feature_store import RoomFeatureStore, FILTER_COLUMNS, PRICE_FILTERS
+
+# Request parsing shared with the food service
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml_common'))
+from request_parsing import id_list, is_id, parse_batch_pairs, parse_ratings, positive_int
 
 # Set UTF-8 encoding for Windows
 if sys.platform == "win32":
@@ -26,9 +36,176 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# Confidence tiers by number of ratings in the user's history
+CONFIDENCE_LEVELS = ('low', 'medium', 'high')
+MEDIUM_CONFIDENCE_RATINGS = 5
+HIGH_CONFIDENCE_RATINGS = 10
+
+# Upper bound on user-room pairs scored by a single /predict/batch call
+MAX_BATCH_PAIRS = 50000
+
+# Version tag written to the manifest of memory-mapped model artifacts
+ARTIFACT_FORMAT = 'room-model-artifact/1'
+# Version tag of precomputed top-K directories (ml_tools/precompute_recommendations.py)
+TOPK_FORMAT = 'topk-recommendations/1'
+
+# Ratings at or above this value count as "liked" in classification metrics
+LIKE_THRESHOLD = 4.0
+# Cells copied per block when converting a dense user_room_matrix to CSR
+DENSE_CONVERSION_CELLS = 4000000
+
+# Serialized /popular payloads kept per (count, filters) request
+POPULAR_CACHE_SIZE = 1024
+
+# Users scored per matrix-matrix product in bulk recommendations, and the most per request
+BULK_BLOCK_SIZE = 1024
+MAX_BULK_USERS = 100000
+
+# Factor vector and rating summary of a user folded in after training
+FoldedUser = namedtuple('FoldedUser', ['vector', 'rated_positions', 'mean_rating', 'confidence', 'ratings'])
+
+def top_k_stable(scores, k):
+    """Indices of the k largest scores, ties broken by position like a stable descending sort"""
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+    candidates = np.flatnonzero(scores >= threshold)
+    return candidates[np.argsort(-scores[candidates], kind='stable')[:k]]
+
+def top_k_rows(scores, k):
+    """Row-wise top_k_stable for a 2-D score block: (rows x k) column indices, best first.
+
+    A block-wide partition gives each row's k-th largest score; every column
+    above it is kept, plus the lowest-index columns equal to it, so ties are
+    broken by position exactly as top_k_stable does, without a loop over rows.
+    """
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k <= 0:
+        return np.empty((n_rows, 0), dtype=np.int64)
+
+    threshold = np.partition(scores, n_cols - k, axis=1)[:, n_cols - k:n_cols - k + 1]
+    keep = scores > threshold
+    needed = k - keep.sum(axis=1)
+
+    # The first needed ties usually sit in a short prefix; widen it only for rows that need more
+    pending, width = np.arange(n_rows), 4 * k
+    while len(pending) > 0:
+        width = min(width, n_cols)
+        tied = scores[pending, :width] == threshold[pending]
+        rank = np.cumsum(tied, axis=1, dtype=np.int32)
+        done = (rank[:, -1] >= needed[pending]) | (width == n_cols)
+        rows = pending[done]
+        keep[rows, :width] |= tied[done] & (rank[done] <= needed[rows, None])
+        pending, width = pending[~done], width * 4
+
+    # Exactly k columns per row in column order, so the stable sort by score breaks ties by position
+    columns = np.nonzero(keep)[1].reshape(n_rows, k)
+    order = np.argsort(-np.take_along_axis(scores, columns, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(columns, order, axis=1)
+
+class RecommendationCache:
+    """Thread-safe per-user top-K recommendation cache.
+
+    With max_size=None the cache is unbounded (used for eager precomputation);
+    otherwise the least recently used users are evicted.
+    """
+
+    def __init__(self, top_k, max_size=None):
+        self.top_k = top_k
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if self.max_size is not None:
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id, recommendations):
+        with self._lock:
+            self._entries[user_id] = recommendations
+            if self.max_size is not None:
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'top_k': self.top_k,
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+class PrecomputedTopK:
+    """Per-user top-K recommendations written offline, memory-mapped read-only.
+
+    items holds room positions (-1 pads users with fewer than k unrated
+    rooms) and scores the matching raw factor scores, one row per model user.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != TOPK_FORMAT:
+            raise ValueError(f"Unsupported top-K format: {self.manifest.get('format')}")
+        self.k = self.manifest['k']
+        self.items = np.load(os.path.join(path, 'items.npy'), mmap_mode='r')
+        self.scores = np.load(os.path.join(path, 'scores.npy'), mmap_mode='r')
+
+    def get(self, row, n):
+        """(item positions, scores) of a user's first n precomputed recommendations"""
+        items = np.asarray(self.items[row, :n])
+        valid = items >= 0
+        return items[valid].astype(np.int64), np.asarray(self.scores[row, :n])[valid]
+
 class RoomRecommendationEngine:
-    def __init__(self, model_path='room_recommendation_model.pkl'):
+    def __init__(self, model_path='room_recommendation_model.pkl', cache_mode=None, cache_top_k=50, cache_size=10000,
+                 ann_n_probe=None, ann_min_rooms=2000, metrics_chunk_size=1000000,
+                 fold_in_regularization=1e-3, fold_in_max_users=100000, precomputed_path=None,
+                 evaluate_on_load=True):
+        """
+        cache_mode: None to disable the recommendation cache, 'lazy' for a bounded
+        LRU filled on demand, or 'eager' to precompute every known user at load.
+        ann_n_probe: number of IVF lists probed per query to enable approximate
+        top-N retrieval, used once the catalogue has at least ann_min_rooms rooms.
+        metrics_chunk_size: observed ratings scored per step when computing
+        metrics, which bounds their peak memory.
+        fold_in_regularization / fold_in_max_users: ridge term and capacity for
+        users folded in online with fold_in_user().
+        precomputed_path: offline top-K directory served for unconstrained
+        requests, used only when it was computed from the loaded model.
+        evaluate_on_load: start the background classification evaluation
+        after each load (batch jobs turn it off).
+        """
         self.model_path = model_path
+        self.model_version = 0
+        self.metrics_chunk_size = metrics_chunk_size
+        self.evaluate_on_load = evaluate_on_load
+        self.fold_in_regularization = fold_in_regularization
+        self.fold_in_max_users = fold_in_max_users
+        self.cache_mode = cache_mode
+        self.cache_top_k = cache_top_k
+        self.cache_size = cache_size
+        self.recommendation_cache = None
+        self.ann_n_probe = ann_n_probe
+        self.ann_min_rooms = ann_min_rooms
+        self.ann_index = None
+        self.precomputed_path = precomputed_path
+        self.precomputed = None
         self.model_loaded = False
         self.model_ready = False
         self.load_start_time = None
@@ -40,67 +217,418 @@ class RoomRecommendationEngine:
         self.room_factors = None
         self.user_room_matrix = None
         self.room_features = None
+        self.features = None
+        self.popular_payloads = None
+        self._popular_json = {}
         self.user_profiles = None
+
+        # Integer index maps and sparse ratings built at load time
+        self.user_ids = []
+        self.room_ids = []
+        self.user_index = {}
+        self.room_index = {}
+        self.ratings = None
+        self.rating_counts = None
+        self.confidence_tiers = None
+        self.user_means = None
+
+        # Users folded in since load; they take precedence over the trained factors
+        self.room_gram = None
+        self.folded_users = {}
+        self._fold_in_lock = threading.Lock()
         
         # Performance metrics
         self.rmse = 0.0
         self.mae = 0.0
+
+        # Classification evaluation, computed once per loaded model in the background
+        self.evaluation = None
+        self._evaluation_thread = None
+        self._evaluation_lock = threading.Lock()
         
-    def load_model(self):
-        """Load the trained room recommendation model"""
+    def load_model(self, data=None):
+        """Load the trained room recommendation model
+
+        data: optional in-memory dict with the same layout as the pickle, used
+        instead of reading model_path (benchmarks and generated models).
+        """
         try:
             self.load_start_time = time.time()
-            logger.info(f"Loading room recommendation model from {self.model_path}")
+            logger.info(f"Loading room recommendation model from {self.model_path if data is None else 'memory'}")
             
-            if not os.path.exists(self.model_path):
+            if data is None and not os.path.exists(self.model_path):
                 logger.error(f"Model file not found: {self.model_path}")
                 return False
+
+            if data is None and os.path.isdir(self.model_path):
+                # Pickle-free artifact: memory-mapped arrays shared between processes
+                manifest = self._load_artifact(self.model_path)
+            else:
+                if data is None:
+                    with open(self.model_path, 'rb') as f:
+                        data = pickle.load(f)
+                self.data = data
                 
-            with open(self.model_path, 'rb') as f:
-                self.data = pickle.load(f)
-            
-            # Extract model components
-            self.svd_model = self.data['svd_model']
-            self.user_factors = self.data['user_factors']
-            self.room_factors = self.data['room_factors']
-            self.user_room_matrix = self.data['user_room_matrix']
-            self.room_features = self.data['room_features']
-            self.user_profiles = self.data['user_profiles']
+                # Extract model components
+                self.svd_model = self.data['svd_model']
+                self.user_factors = self.data['user_factors']
+                self.room_factors = self.data['room_factors']
+                self.user_room_matrix = self.data['user_room_matrix']
+                self.room_features = self.data['room_features']
+                self.user_profiles = self.data['user_profiles']
+
+                self._build_indexes()
+                # The CSR matrix replaces the frame; drop it so memory scales with the ratings
+                self.user_room_matrix = None
+                self.data = None
+                manifest = {}
+
+            # Room metadata as aligned columns for enrichment by array gathers
+            self.features = RoomFeatureStore(self.room_features, self.room_ids)
+            self._build_popular_payloads()
+            self.ann_index = self._build_ann_index()
+            # Gram matrix of the room factors for online fold-in (components x components)
+            room_factors = np.asarray(self.room_factors, dtype=np.float64)
+            self.room_gram = room_factors.T @ room_factors
             
             self.training_time = time.time() - self.load_start_time
             
-            # Calculate model performance metrics
-            self._calculate_metrics()
+            # Calculate model performance metrics (artifacts carry them precomputed)
+            if 'metrics' in manifest:
+                self.rmse = manifest['metrics']['rmse']
+                self.mae = manifest['metrics']['mae']
+            else:
+                self._calculate_metrics()
             
             self.model_loaded = True
             self.model_ready = True
+
+            # Replace any cache built for a previous model in one assignment
+            self.recommendation_cache = self._build_recommendation_cache()
+            self.precomputed = self._open_precomputed()
+
+            # Results from a previous model no longer apply
+            self.evaluation = None
+            if self.evaluate_on_load:
+                self.start_evaluation()
             
             logger.info(f"Room recommendation model loaded successfully in {self.training_time:.2f}s")
             logger.info(f"Model metrics - RMSE: {self.rmse:.4f}, MAE: {self.mae:.4f}")
-            logger.info(f"Matrix size: {self.user_room_matrix.shape[0]} users × {self.user_room_matrix.shape[1]} rooms")
+            logger.info(f"Matrix size: {len(self.user_ids)} users × {len(self.room_ids)} rooms")
             
             return True
             
         except Exception as e:
             logger.error(f"Error loading room recommendation model: {str(e)}")
+            self.recommendation_cache = None
             self.model_loaded = False
             self.model_ready = False
             return False
+
+    def _build_indexes(self):
+        """Build ID-to-position maps and a CSR ratings matrix from user_room_matrix
+
+        Accepts a dense or sparse DataFrame (the training notebook layout) or a
+        scipy.sparse matrix with 'user_ids' and 'room_ids' lists in the model data.
+        """
+        matrix = self.user_room_matrix
+        if sparse.issparse(matrix):
+            user_ids, room_ids = list(self.data['user_ids']), list(self.data['room_ids'])
+            ratings = sparse.csr_matrix(matrix)
+        else:
+            user_ids, room_ids = matrix.index.tolist(), matrix.columns.tolist()
+            if hasattr(matrix, 'sparse'):
+                ratings = matrix.sparse.to_coo().tocsr()
+            else:
+                # Convert dense frames in row blocks so only one block is copied at a time
+                values = matrix.values
+                block_rows = max(1, DENSE_CONVERSION_CELLS // max(1, values.shape[1]))
+                ratings = sparse.vstack([
+                    sparse.csr_matrix(values[start:start + block_rows])
+                    for start in range(0, max(1, values.shape[0]), block_rows)
+                ], format='csr')
+
+        if ratings.shape != (len(user_ids), len(room_ids)):
+            raise ValueError(f"user_room_matrix shape {ratings.shape} does not match "
+                             f"{len(user_ids)} users x {len(room_ids)} rooms")
+
+        # Only positive entries count as observed ratings; NaN cells of a pivoted frame are unrated
+        ratings.data[~(ratings.data > 0)] = 0
+        ratings.eliminate_zeros()
+        ratings.sort_indices()
+
+        self._set_ratings(user_ids, room_ids, ratings)
+
+    def _set_ratings(self, user_ids, room_ids, ratings):
+        """Install ID maps and a canonical CSR ratings matrix, and derive per-user statistics"""
+        self.user_ids = user_ids
+        self.room_ids = room_ids
+        self.user_index = {user_id: idx for idx, user_id in enumerate(self.user_ids)}
+        self.room_index = {room_id: idx for idx, room_id in enumerate(self.room_ids)}
+        self.ratings = ratings
+
+        # Per-user rating counts and confidence tiers in one vectorized pass
+        self.rating_counts = np.diff(ratings.indptr)
+        self.confidence_tiers = np.select(
+            [self.rating_counts >= HIGH_CONFIDENCE_RATINGS, self.rating_counts >= MEDIUM_CONFIDENCE_RATINGS],
+            [2, 1],
+            default=0
+        ).astype(np.int8)
+
+        # Mean observed rating per user (3.5 for users without ratings)
+        rating_sums = np.asarray(ratings.sum(axis=1)).ravel()
+        self.user_means = np.full(len(self.user_ids), 3.5)
+        np.divide(rating_sums, self.rating_counts, out=self.user_means, where=self.rating_counts > 0)
+
+    def ratings_storage_stats(self):
+        """Size of the sparse ratings storage, for /status"""
+        ratings = self.ratings
+        return {
+            'format': 'csr',
+            'nnz': int(ratings.nnz),
+            'density': ratings.nnz / max(1, ratings.shape[0] * ratings.shape[1]),
+            'bytes': int(ratings.data.nbytes + ratings.indices.nbytes + ratings.indptr.nbytes)
+        }
+
+    def save_artifact(self, artifact_dir):
+        """Write the loaded model as a pickle-free, memory-mappable artifact directory.
+
+        Layout: .npy factor and CSR arrays, JSON ID tables, one .npy file per
+        room feature column (categorical columns dictionary-encoded) and a
+        manifest.json with precomputed metrics. The directory is written next
+        to the target and renamed into place.
+        """
+        if not self.model_ready:
+            raise RuntimeError('model must be loaded before it can be exported')
+
+        tmp_dir = f"{artifact_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(os.path.join(tmp_dir, 'features'))
+
+        np.save(os.path.join(tmp_dir, 'user_factors.npy'), np.ascontiguousarray(self.user_factors))
+        np.save(os.path.join(tmp_dir, 'room_factors.npy'), np.ascontiguousarray(self.room_factors))
+        np.save(os.path.join(tmp_dir, 'ratings_data.npy'), self.ratings.data)
+        np.save(os.path.join(tmp_dir, 'ratings_indices.npy'), self.ratings.indices)
+        np.save(os.path.join(tmp_dir, 'ratings_indptr.npy'), self.ratings.indptr)
+
+        feature_columns = []
+        for i, column in enumerate(self.room_features.columns):
+            values = self.room_features[column]
+            file_name = f'features/column_{i}.npy'
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                np.save(os.path.join(tmp_dir, file_name), values.to_numpy())
+                feature_columns.append({'name': column, 'file': file_name, 'encoding': 'plain'})
+            else:
+                categorical = pd.Categorical(values)
+                np.save(os.path.join(tmp_dir, file_name), categorical.codes.astype(np.int32))
+                feature_columns.append({
+                    'name': column,
+                    'file': file_name,
+                    'encoding': 'dictionary',
+                    'categories': categorical.categories.tolist()
+                })
+
+        def write_json(name, payload):
+            with open(os.path.join(tmp_dir, name), 'w', encoding='utf-8') as f:
+                json.dump(payload, f, default=str)
+
+        write_json('user_ids.json', self.user_ids)
+        write_json('room_ids.json', self.room_ids)
+        write_json('feature_room_ids.json', self.room_features.index.tolist())
+        write_json('user_profiles.json', self.user_profiles)
+        write_json('manifest.json', {
+            'format': ARTIFACT_FORMAT,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'n_users': len(self.user_ids),
+            'n_rooms': len(self.room_ids),
+            'n_components': int(self.user_factors.shape[1]),
+            'n_ratings': int(self.ratings.nnz),
+            'ratings_shape': list(self.ratings.shape),
+            'feature_columns': feature_columns,
+            'metrics': {'rmse': float(self.rmse), 'mae': float(self.mae)}
+        })
+
+        if os.path.isdir(artifact_dir):
+            shutil.rmtree(artifact_dir)
+        os.replace(tmp_dir, artifact_dir)
+        logger.info(f"Model artifact written to {artifact_dir}")
+
+    def _load_artifact(self, artifact_dir):
+        """Open a pickle-free artifact directory with memory-mapped arrays; returns its manifest"""
+        def read_json(name):
+            with open(os.path.join(artifact_dir, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        def open_array(name):
+            return np.load(os.path.join(artifact_dir, name), mmap_mode='r')
+
+        manifest = read_json('manifest.json')
+        if manifest.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format: {manifest.get('format')}")
+
+        self.data = None
+        self.svd_model = None
+        self.user_room_matrix = None
+        self.user_factors = open_array('user_factors.npy')
+        self.room_factors = open_array('room_factors.npy')
+
+        features = {}
+        for column in manifest['feature_columns']:
+            values = open_array(column['file'])
+            if column['encoding'] == 'dictionary':
+                values = pd.Categorical.from_codes(values, categories=column['categories'])
+            features[column['name']] = values
+        self.room_features = pd.DataFrame(features, index=read_json('feature_room_ids.json'))
+        self.user_profiles = read_json('user_profiles.json')
+
+        ratings = sparse.csr_matrix(
+            (open_array('ratings_data.npy'), open_array('ratings_indices.npy'), open_array('ratings_indptr.npy')),
+            shape=tuple(manifest['ratings_shape'])
+        )
+        self._set_ratings(read_json('user_ids.json'), read_json('room_ids.json'), ratings)
+        return manifest
+
+    def warm_up(self, n_users=5):
+        """Exercise the scoring paths once so the first real requests do not pay for page faults"""
+        if not self.model_ready:
+            return
+        self.get_popular_rooms(10)
+        for user_id in self.user_ids[:n_users]:
+            self._compute_user_recommendations(user_id, 10)
+        if self.user_ids and self.room_ids:
+            self.predict_ratings_batch(self.user_ids[:n_users], self.room_ids[:n_users])
+
+    def _build_ann_index(self):
+        """Build the approximate top-N index over room factors when enabled"""
+        if not self.ann_n_probe or len(self.room_ids) < self.ann_min_rooms:
+            return None
+
+        start = time.time()
+        index = IVFInnerProductIndex(n_probe=self.ann_n_probe).build(self.room_factors)
+        logger.info(f"Built IVF index with {index.n_lists} lists over {index.n_items} rooms "
+                    f"in {time.time() - start:.2f}s (n_probe={index.n_probe})")
+        return index
+
+    def _user_rated_rooms(self, user_idx):
+        """Return (room positions, ratings) observed for a user row"""
+        start, end = self.ratings.indptr[user_idx], self.ratings.indptr[user_idx + 1]
+        return self.ratings.indices[start:end], self.ratings.data[start:end]
+
+    def fold_in_user(self, user_id, ratings):
+        """Compute a factor vector for a new or active user from their ratings, without retraining.
+
+        ratings maps room_id -> rating. For users already in the model (or folded
+        in before) they are merged with the known ratings, newest winning. The
+        model is TruncatedSVD over the full matrix with unrated cells as zeros, so
+        the least-squares fit min ||x - Q u||^2 + reg ||u||^2 over all rooms needs
+        only the precomputed Gram matrix Q^T Q and the rated rows of Q.
+        Returns a summary dict; rooms missing from the model are ignored.
+        Raises ValueError when no rated room is in the model, so the user
+        stays on the cold-start path instead of getting a zero vector.
+        """
+        if not self.model_ready:
+            raise RuntimeError('model not loaded')
+
+        merged = {}
+        folded = self.folded_users.get(user_id)
+        user_idx = self.user_index.get(user_id)
+        if folded is not None:
+            merged.update(folded.ratings)
+        elif user_idx is not None:
+            positions, values = self._user_rated_rooms(user_idx)
+            merged.update(zip([self.room_ids[position] for position in positions], values.tolist()))
+
+        ignored = []
+        for room_id, rating in ratings.items():
+            if room_id in self.room_index:
+                merged[room_id] = float(rating)
+            else:
+                ignored.append(room_id)
+        if not merged:
+            raise ValueError('none of the rated rooms are in the model')
+
+        rated_positions = np.array(sorted(self.room_index[room_id] for room_id in merged), dtype=np.int64)
+        rated_values = np.array([merged[self.room_ids[position]] for position in rated_positions], dtype=np.float64)
+
+        n_factors = self.room_gram.shape[0]
+        rhs = np.asarray(self.room_factors[rated_positions], dtype=np.float64).T @ rated_values
+        vector = np.linalg.solve(self.room_gram + self.fold_in_regularization * np.eye(n_factors), rhs)
+
+        n_ratings = len(rated_values)
+        tier = 2 if n_ratings >= HIGH_CONFIDENCE_RATINGS else 1 if n_ratings >= MEDIUM_CONFIDENCE_RATINGS else 0
+        entry = FoldedUser(
+            vector=vector.astype(self.room_factors.dtype),
+            rated_positions=rated_positions,
+            mean_rating=float(rated_values.mean()) if n_ratings else 3.5,
+            confidence=CONFIDENCE_LEVELS[tier],
+            ratings=merged
+        )
+
+        with self._fold_in_lock:
+            self.folded_users.pop(user_id, None)
+            self.folded_users[user_id] = entry
+            # Forget the longest-unchanged users beyond capacity
+            while len(self.folded_users) > self.fold_in_max_users:
+                self.folded_users.pop(next(iter(self.folded_users)))
+
+        return {
+            'user_id': user_id,
+            'known_user': user_idx is not None,
+            'rated_rooms': n_ratings,
+            'ignored_rooms': ignored,
+            'confidence': entry.confidence
+        }
+
+    def _build_recommendation_cache(self):
+        """Create a fresh recommendation cache for the loaded model"""
+        if self.cache_mode not in ('lazy', 'eager'):
+            return None
+
+        if self.cache_mode == 'lazy':
+            return RecommendationCache(self.cache_top_k, self.cache_size)
+
+        start = time.time()
+        cache = RecommendationCache(self.cache_top_k)
+        for user_id in self.user_ids:
+            cache.put(user_id, self._compute_user_recommendations(user_id, self.cache_top_k))
+        logger.info(f"Precomputed top-{self.cache_top_k} recommendations for "
+                    f"{len(self.user_ids)} users in {time.time() - start:.2f}s")
+        return cache
     
+    def _iter_observed_predictions(self):
+        """Yield (actual, predicted) arrays for the observed ratings, metrics_chunk_size at a time.
+
+        Predictions are row-wise dot products gathered at the CSR coordinates, so
+        peak memory is bounded by the chunk size rather than users x rooms.
+        """
+        indptr = self.ratings.indptr
+        chunk_size = max(1, int(self.metrics_chunk_size))
+        for start in range(0, self.ratings.nnz, chunk_size):
+            end = min(start + chunk_size, self.ratings.nnz)
+            rows = np.searchsorted(indptr, np.arange(start, end), side='right') - 1
+            columns = self.ratings.indices[start:end]
+            predicted = np.einsum('ij,ij->i', self.user_factors[rows], self.room_factors[columns])
+            yield np.asarray(self.ratings.data[start:end], dtype=np.float64), predicted
+
     def _calculate_metrics(self):
         """Calculate RMSE and MAE for the model"""
         try:
-            # Reconstruct the full matrix using proper matrix multiplication
-            reconstructed = np.dot(self.user_factors, self.room_factors.T)
+            # Stream squared and absolute errors over the observed ratings
+            squared_error = 0.0
+            absolute_error = 0.0
+            count = 0
+            for actual_ratings, predicted_ratings in self._iter_observed_predictions():
+                errors = actual_ratings - predicted_ratings
+                squared_error += float(errors @ errors)
+                absolute_error += float(np.abs(errors).sum())
+                count += len(errors)
 
-            # Get actual ratings (non-zero entries)
-            actual_mask = self.user_room_matrix.values > 0
-            actual_ratings = self.user_room_matrix.values[actual_mask]
-            predicted_ratings = reconstructed[actual_mask]
+            if count == 0:
+                raise ValueError('no observed ratings')
 
             # Calculate metrics
-            self.rmse = np.sqrt(mean_squared_error(actual_ratings, predicted_ratings))
-            self.mae = mean_absolute_error(actual_ratings, predicted_ratings)
+            self.rmse = np.sqrt(squared_error / count)
+            self.mae = absolute_error / count
 
         except Exception as e:
             logger.error(f"Error calculating metrics: {str(e)}")
@@ -108,29 +636,90 @@ class RoomRecommendationEngine:
             self.rmse = 0.92  # Realistic RMSE for room recommendations
             self.mae = 0.74   # Realistic MAE for room recommendations
 
+    def evaluate_classification(self, like_threshold=LIKE_THRESHOLD):
+        """Confusion matrix over every observed rating of every user.
+
+        A rating is a positive when the user gave it like_threshold or more, and
+        predicted positive when the clipped reconstruction reaches the same
+        threshold. Predictions are gathered only at the observed coordinates in
+        bounded chunks, so the dense users x rooms matrix is never built.
+        """
+        start = time.time()
+        true_positives = false_positives = true_negatives = false_negatives = 0
+        for actual, predicted in self._iter_observed_predictions():
+            actual_positive = actual >= like_threshold
+            predicted_positive = np.clip(predicted, 1.0, 5.0) >= like_threshold
+
+            true_positives += int(np.count_nonzero(actual_positive & predicted_positive))
+            false_positives += int(np.count_nonzero(~actual_positive & predicted_positive))
+            true_negatives += int(np.count_nonzero(~actual_positive & ~predicted_positive))
+            false_negatives += int(np.count_nonzero(actual_positive & ~predicted_positive))
+
+        total = true_positives + false_positives + true_negatives + false_negatives
+        accuracy = (true_positives + true_negatives) / total if total > 0 else 0
+        precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
+        recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
+        specificity = true_negatives / (true_negatives + false_positives) if (true_negatives + false_positives) > 0 else 0
+        f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+
+        return {
+            'confusion_matrix': {
+                'true_positives': true_positives,
+                'false_positives': false_positives,
+                'true_negatives': true_negatives,
+                'false_negatives': false_negatives,
+                'accuracy': accuracy,
+                'precision': precision,
+                'recall': recall,
+                'specificity': specificity,
+                'f1_score': f1_score
+            },
+            'sample_size': int(np.count_nonzero(self.rating_counts)),
+            'evaluated_ratings': total,
+            'like_threshold': like_threshold,
+            'computation_time': time.time() - start
+        }
+
+    def start_evaluation(self):
+        """Compute the classification evaluation on a background thread if it is not cached or running"""
+        with self._evaluation_lock:
+            if self.evaluation is not None or not self.model_ready:
+                return
+            if self._evaluation_thread is not None and self._evaluation_thread.is_alive():
+                return
+            self._evaluation_thread = threading.Thread(target=self._run_evaluation, daemon=True)
+            self._evaluation_thread.start()
+
+    def _run_evaluation(self):
+        try:
+            self.evaluation = self.evaluate_classification()
+            logger.info(f"Classification evaluation over {self.evaluation['evaluated_ratings']} ratings "
+                        f"finished in {self.evaluation['computation_time']:.2f}s")
+        except Exception as e:
+            logger.error(f"Error evaluating model: {str(e)}")
+
     def predict_rating(self, user_id, room_id):
         """Predict rating for a specific user-room pair"""
         if not self.model_ready:
             return 3.5  # Default rating
             
         try:
-            if user_id not in self.user_room_matrix.index:
+            folded = self.folded_users.get(user_id)
+            if folded is not None:
+                room_idx = self.room_index.get(room_id)
+                if room_idx is None:
+                    return folded.mean_rating
+                return float(np.clip(self.room_factors[room_idx] @ folded.vector, 1.0, 5.0))
+
+            user_idx = self.user_index.get(user_id)
+            if user_idx is None:
                 # New user - return average room rating
-                if room_id in self.room_features.index:
-                    return float(self.room_features.loc[room_id, 'rating'])
-                return 3.5
+                return self.features.rating(room_id)
                 
-            if room_id not in self.user_room_matrix.columns:
+            room_idx = self.room_index.get(room_id)
+            if room_idx is None:
                 # New room - return user's average rating
-                user_ratings = self.user_room_matrix.loc[user_id]
-                rated_rooms = user_ratings[user_ratings > 0]
-                if len(rated_rooms) > 0:
-                    return float(rated_rooms.mean())
-                return 3.5
-            
-            # Get prediction from SVD model
-            user_idx = self.user_room_matrix.index.get_loc(user_id)
-            room_idx = self.user_room_matrix.columns.get_loc(room_id)
+                return float(self.user_means[user_idx])
             
             predicted_rating = self.user_factors[user_idx] @ self.room_factors[room_idx]
             
@@ -141,137 +730,470 @@ class RoomRecommendationEngine:
             logger.error(f"Error predicting rating: {str(e)}")
             return 3.5
 
+    def predict_ratings_batch(self, user_ids, room_ids):
+        """Predict ratings for many user-room pairs at once.
+
+        Returns (predicted_ratings, confidences) in input order, applying the same
+        fallbacks as predict_rating for new users and new rooms.
+        """
+        n_pairs = len(user_ids)
+        if not self.model_ready:
+            return np.full(n_pairs, 3.5), ['low'] * n_pairs
+
+        user_idx = np.fromiter((self.user_index.get(u, -1) for u in user_ids), dtype=np.int64, count=n_pairs)
+        room_idx = np.fromiter((self.room_index.get(r, -1) for r in room_ids), dtype=np.int64, count=n_pairs)
+        known_user = user_idx >= 0
+        known_room = room_idx >= 0
+
+        predictions = np.full(n_pairs, 3.5)
+
+        # Known pairs: one gathered row-wise dot product
+        both = known_user & known_room
+        if both.any():
+            scores = np.einsum('ij,ij->i', self.user_factors[user_idx[both]], self.room_factors[room_idx[both]])
+            predictions[both] = np.clip(scores, 1.0, 5.0)
+
+        # Known user, new room: user's average rating
+        new_room = known_user & ~known_room
+        predictions[new_room] = self.user_means[user_idx[new_room]]
+
+        # New user: the room's average rating where available
+        new_user = np.flatnonzero(~known_user)
+        if len(new_user) > 0:
+            rows = self.features.rows_for_ids([room_ids[i] for i in new_user])
+            room_ratings = self.features.ratings[rows]
+            predictions[new_user] = np.where((rows >= 0) & ~np.isnan(room_ratings), room_ratings, 3.5)
+
+        tiers = np.zeros(n_pairs, dtype=np.int8)
+        tiers[known_user] = self.confidence_tiers[user_idx[known_user]]
+        confidences = [CONFIDENCE_LEVELS[tier] for tier in tiers]
+
+        # Folded-in users override the trained factors pair by pair
+        folded_users = self.folded_users
+        if folded_users:
+            for position in [i for i, user_id in enumerate(user_ids) if user_id in folded_users]:
+                predictions[position] = self.predict_rating(user_ids[position], room_ids[position])
+                confidences[position] = folded_users[user_ids[position]].confidence
+
+        return predictions, confidences
+
     def calculate_confidence(self, user_id, room_id):
         """Calculate confidence score for a prediction"""
         if not self.model_ready:
             return 'low'
             
         try:
-            if user_id not in self.user_room_matrix.index:
+            folded = self.folded_users.get(user_id)
+            if folded is not None:
+                return folded.confidence
+
+            user_idx = self.user_index.get(user_id)
+            if user_idx is None:
                 return 'low'
                 
-            # Calculate confidence based on user's rating history
-            user_ratings = self.user_room_matrix.loc[user_id]
-            num_ratings = (user_ratings > 0).sum()
-            
-            if num_ratings >= 10:
-                return 'high'
-            elif num_ratings >= 5:
-                return 'medium'
-            else:
-                return 'low'
+            # Confidence tier precomputed from the user's rating history
+            return CONFIDENCE_LEVELS[self.confidence_tiers[user_idx]]
                 
         except Exception as e:
             logger.error(f"Error calculating confidence: {str(e)}")
             return 'low'
 
-    def get_user_recommendations(self, user_id, candidate_rooms=None, n_recommendations=10):
-        """Get room recommendations for a user"""
+    def get_user_recommendations(self, user_id, candidate_rooms=None, n_recommendations=10, filters=None):
+        """Get room recommendations for a user.
+
+        candidate_rooms (room IDs) and filters (hotel, room_type,
+        price_category, min_price, max_price) restrict the result to eligible
+        rooms; only those are scored.
+        """
         if not self.model_ready:
             return []
             
         try:
-            if user_id not in self.user_room_matrix.index:
-                return self.get_popular_rooms(n_recommendations)
-
-            user_idx = self.user_room_matrix.index.get_loc(user_id)
-            user_ratings = np.dot(self.user_factors[user_idx:user_idx+1], self.room_factors.T)[0]
-
-            # Get unrated rooms
-            unrated_rooms = self.user_room_matrix.columns[self.user_room_matrix.loc[user_id] == 0]
-
-            recommendations = []
-            for room_id in unrated_rooms:
-                room_idx = self.user_room_matrix.columns.get_loc(room_id)
-                score = user_ratings[room_idx]
-                confidence = self.calculate_confidence(user_id, room_id)
-
-                room_info = {
-                    'room_id': room_id,
-                    'predicted_rating': float(np.clip(score, 1.0, 5.0)),
-                    'confidence': confidence,
-                    'reason': 'svd_collaborative_filtering'
-                }
-
-                if room_id in self.room_features.index:
-                    features = self.room_features.loc[room_id]
-                    room_info.update({
-                        'hotel': features.get('hotel', 'Unknown'),
-                        'room_type': features.get('assigned_room_type', 'Standard'),
-                        'price': float(features.get('adr', 100)),
-                        'price_category': str(features.get('price_category', 'Medium')),
-                        'avg_rating': float(features.get('rating', 3.5))
-                    })
-
-                recommendations.append(room_info)
-
-            # Sort by predicted rating
-            recommendations.sort(key=lambda x: x['predicted_rating'], reverse=True)
-            return recommendations[:n_recommendations]
+            eligible = self.eligible_positions(candidate_rooms, filters)
+
+            folded = self.folded_users.get(user_id)
+            if folded is not None:
+                # Folded-in users change between requests, so they are never cached
+                return self._rank_unrated_rooms(
+                    folded.vector, folded.rated_positions, n_recommendations, folded.confidence, eligible)
+
+            if user_id not in self.user_index:
+                return self.get_popular_rooms(n_recommendations, filters, candidate_rooms)
+
+            if eligible is not None:
+                # Constrained requests depend on the request, so they bypass the cache
+                return self._compute_user_recommendations(user_id, n_recommendations, eligible)
+
+            precomputed = self.precomputed
+            if precomputed is not None and n_recommendations <= precomputed.k:
+                return self._precomputed_recommendations(self.user_index[user_id], n_recommendations)
+
+            cache = self.recommendation_cache
+            if cache is None or n_recommendations > cache.top_k:
+                return self._compute_user_recommendations(user_id, n_recommendations)
+
+            cached = cache.get(user_id)
+            if cached is None:
+                cached = self._compute_user_recommendations(user_id, cache.top_k)
+                cache.put(user_id, cached)
+            return cached[:n_recommendations]
             
         except Exception as e:
             logger.error(f"Error getting recommendations: {str(e)}")
             return []
 
-    def get_popular_rooms(self, top_n=10):
-        """Get popular rooms for new users"""
+    def factor_fingerprint(self):
+        """Cheap identity of the loaded factors and ratings, recorded with precomputed top-K files"""
+        return {
+            'n_users': len(self.user_ids),
+            'n_items': len(self.room_ids),
+            'n_ratings': int(self.ratings.nnz),
+            'n_components': int(self.room_factors.shape[1]),
+            'checksum': round(float(np.asarray(self.room_factors, dtype=np.float64, order='C').sum())
+                              + float(np.asarray(self.user_factors[:1000], dtype=np.float64, order='C').sum()), 6)
+        }
+
+    def _open_precomputed(self):
+        """Open the offline top-K directory when it was computed from the loaded model"""
+        if not self.precomputed_path:
+            return None
         try:
-            if not self.model_ready or self.room_features is None:
+            precomputed = PrecomputedTopK(self.precomputed_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not open precomputed top-K {self.precomputed_path}: {e}")
+            return None
+        if precomputed.manifest.get('fingerprint') != self.factor_fingerprint():
+            logger.warning(f"Precomputed top-K at {self.precomputed_path} does not match the loaded model - ignoring it")
+            return None
+        logger.info(f"Serving precomputed top-{precomputed.k} recommendations from {self.precomputed_path}")
+        return precomputed
+
+    def _precomputed_recommendations(self, user_idx, n_recommendations):
+        top, raw_scores = self.precomputed.get(user_idx, n_recommendations)
+        return self._build_recommendations(CONFIDENCE_LEVELS[self.confidence_tiers[user_idx]], top, raw_scores)
+
+    def eligible_positions(self, candidate_rooms=None, filters=None):
+        """Sorted room positions allowed by candidate_rooms and filters, or None when unconstrained"""
+        positions = None
+        if candidate_rooms:
+            positions = np.fromiter((self.room_index.get(room_id, -1) for room_id in candidate_rooms),
+                                    dtype=np.int64, count=len(candidate_rooms))
+            positions = np.unique(positions[positions >= 0])
+        if filters:
+            if positions is None:
+                positions = np.arange(len(self.room_ids))
+            # Boolean mask over the positions from the precompiled feature columns
+            positions = positions[self.features.filter_mask(self.features.rows_for_positions(positions), filters)]
+        return positions
+
+    def _compute_user_recommendations(self, user_id, n_recommendations, eligible=None):
+        """Score all unrated (eligible) rooms for a known user and return the top N"""
+        user_idx = self.user_index[user_id]
+        rated_positions, _ = self._user_rated_rooms(user_idx)
+        return self._rank_unrated_rooms(self.user_factors[user_idx], rated_positions, n_recommendations,
+                                        CONFIDENCE_LEVELS[self.confidence_tiers[user_idx]], eligible)
+
+    def _rank_unrated_rooms(self, user_vector, rated_positions, n_recommendations, confidence, eligible=None):
+        """Rank the rooms outside rated_positions for a user factor vector and return the top N.
+
+        eligible (sorted room positions) limits scoring to those rooms.
+        """
+        unrated_positions = None
+        if eligible is not None:
+            unrated_positions = eligible[~np.isin(eligible, rated_positions, assume_unique=True)]
+        elif self.ann_index is not None:
+            # Approximate retrieval: only score rooms in the probed lists
+            candidates = self.ann_index.candidates(user_vector)
+            candidates = candidates[~np.isin(candidates, rated_positions, assume_unique=True)]
+            if len(candidates) >= n_recommendations:
+                unrated_positions = candidates
+
+        if unrated_positions is None:
+            # Exact scan over all unrated rooms
+            unrated = np.ones(len(self.room_ids), dtype=bool)
+            unrated[rated_positions] = False
+            unrated_positions = np.flatnonzero(unrated)
+
+        # Rank unrated rooms by clipped score (stable, so ties keep catalogue order)
+        raw_scores = self.room_factors[unrated_positions] @ user_vector
+        order = top_k_stable(np.clip(raw_scores, 1.0, 5.0), n_recommendations)
+        return self._build_recommendations(confidence, unrated_positions[order], raw_scores[order])
+
+    def get_recommendations_for_users(self, user_ids, n_recommendations=10, cache_results=True):
+        """Get recommendations for many users at once, in input order.
+
+        Known users without a cached list are scored together with one
+        matrix-matrix product (always exact, even with the ANN index enabled).
+        cache_results=False reads the cache but does not fill it, for bulk
+        jobs that would otherwise evict the interactive working set.
+        """
+        if not self.model_ready:
+            return [[] for _ in user_ids]
+
+        results = [None] * len(user_ids)
+        cache = self.recommendation_cache
+        use_cache = cache is not None and n_recommendations <= cache.top_k
+        fill_cache = use_cache and cache_results
+        k = cache.top_k if fill_cache else n_recommendations
+
+        pending = []
+        for position, user_id in enumerate(user_ids):
+            if user_id in self.folded_users:
+                results[position] = self.get_user_recommendations(user_id, n_recommendations=n_recommendations)
+                continue
+            user_idx = self.user_index.get(user_id)
+            if user_idx is None:
+                results[position] = self.get_popular_rooms(n_recommendations)
+                continue
+            if use_cache:
+                cached = cache.get(user_id)
+                if cached is not None:
+                    results[position] = cached[:n_recommendations]
+                    continue
+            pending.append((position, user_idx))
+
+        if pending:
+            user_rows = np.array([user_idx for _, user_idx in pending])
+            for (position, user_idx), (top, raw_scores) in zip(pending, self._rank_user_block(user_rows, k)):
+                recommendations = self._build_recommendations(
+                    CONFIDENCE_LEVELS[self.confidence_tiers[user_idx]], top, raw_scores)
+                if fill_cache:
+                    cache.put(self.user_ids[user_idx], recommendations)
+                results[position] = recommendations[:n_recommendations]
+
+        return results
+
+    def iter_recommendations_for_users(self, user_ids, n_recommendations=10, block_size=BULK_BLOCK_SIZE):
+        """Yield (user_id, recommendations) for many users, scoring block_size users per product"""
+        for start in range(0, len(user_ids), block_size):
+            block = user_ids[start:start + block_size]
+            yield from zip(block, self.get_recommendations_for_users(block, n_recommendations, cache_results=False))
+
+    def _rank_user_block(self, user_rows, k):
+        """Score a block of users against all rooms; returns (top room positions, raw scores) per user"""
+        raw_scores = self.user_factors[user_rows] @ self.room_factors.T
+        scores = np.clip(raw_scores, 1.0, 5.0)
+
+        # Exclude rooms each user already rated, straight from the CSR rows
+        rated = self.ratings[user_rows]
+        rated_rows = np.repeat(np.arange(len(user_rows)), np.diff(rated.indptr))
+        scores[rated_rows, rated.indices] = -np.inf
+
+        top = top_k_rows(scores, k)
+        finite = np.isfinite(np.take_along_axis(scores, top, axis=1))
+        top_raw = np.take_along_axis(raw_scores, top, axis=1)
+        return [(top[row][finite[row]], top_raw[row][finite[row]]) for row in range(len(user_rows))]
+
+    def _build_recommendations(self, confidence, top_positions, raw_scores):
+        """Turn ranked room positions into recommendation dicts with room metadata"""
+        rows = self.features.rows_for_positions(top_positions)
+        with_features = rows >= 0
+        metadata = iter(self.features.metadata(rows[with_features]))
+        predicted = [min(5.0, max(1.0, score)) for score in np.asarray(raw_scores, dtype=np.float64).tolist()]
+
+        recommendations = []
+        for room_idx, score, has_features in zip(top_positions.tolist(), predicted, with_features.tolist()):
+            room_info = {
+                'room_id': self.room_ids[room_idx],
+                'predicted_rating': score,
+                'confidence': confidence,
+                'reason': 'svd_collaborative_filtering'
+            }
+            if has_features:
+                room_info.update(next(metadata))
+            recommendations.append(room_info)
+
+        return recommendations
+
+    def _build_popular_payloads(self):
+        """Build the popularity recommendation dict of every rated room once, indexed by feature row"""
+        rows = self.features.popular_order
+        payloads = [None] * len(self.features)
+        for row, metadata in zip(rows.tolist(), self.features.metadata(rows)):
+            room_info = {
+                'room_id': self.features.feature_room_ids[row],
+                'predicted_rating': metadata['avg_rating'],
+                'confidence': 'medium',
+                'reason': 'popularity'
+            }
+            room_info.update(metadata)
+            payloads[row] = room_info
+        self.popular_payloads = payloads
+        self._popular_json = {}
+
+    def get_popular_rooms(self, top_n=10, filters=None, candidate_rooms=None):
+        """Get popular rooms for new users.
+
+        filters optionally restricts the list by hotel, room_type,
+        price_category and a min_price/max_price band, and candidate_rooms to
+        those room IDs. Rankings are precomputed at load, so this is a slice.
+        """
+        try:
+            if not self.model_ready or self.features is None:
                 return []
-                
-            popular_rooms = self.room_features.nlargest(top_n, 'rating')
-
-            recommendations = []
-            for room_id, features in popular_rooms.iterrows():
-                recommendations.append({
-                    'room_id': room_id,
-                    'predicted_rating': float(features.get('rating', 3.5)),
-                    'confidence': 'medium',
-                    'reason': 'popularity',
-                    'hotel': features.get('hotel', 'Unknown'),
-                    'room_type': features.get('assigned_room_type', 'Standard'),
-                    'price': float(features.get('adr', 100)),
-                    'price_category': str(features.get('price_category', 'Medium')),
-                    'avg_rating': float(features.get('rating', 3.5))
-                })
 
-            return recommendations
+            candidate_rows = self.features.rows_for_ids(candidate_rooms) if candidate_rooms else None
+            rows = self.features.popular_rows(top_n, filters, candidate_rows)
+            return [dict(self.popular_payloads[row]) for row in rows.tolist()]
             
         except Exception as e:
             logger.error(f"Error getting popular rooms: {str(e)}")
             return []
 
-# Initialize the recommendation engine
-room_recommendation_model = RoomRecommendationEngine()
+    def get_popular_rooms_json(self, top_n=10, filters=None):
+        """Popular rooms as serialized JSON (bytes) plus their count, cached per request shape"""
+        key = (top_n, tuple(sorted((filters or {}).items())))
+        cached = self._popular_json.get(key)
+        if cached is None:
+            popular_rooms = self.get_popular_rooms(top_n, filters)
+            cached = (json.dumps(popular_rooms).encode('utf-8'), len(popular_rooms))
+            if len(self._popular_json) >= POPULAR_CACHE_SIZE:
+                self._popular_json.clear()
+            self._popular_json[key] = cached
+        return cached
+
+def create_engine(model_path=None):
+    """Create an engine configured from the environment"""
+    # ROOM_MODEL_PATH may point at a .pkl file or a converted artifact directory
+    # ROOM_REC_CACHE_MODE=lazy|eager enables the per-user top-K recommendation cache
+    # ROOM_REC_ANN_PROBE enables approximate top-N retrieval for large catalogues
+    # ROOM_PRECOMPUTED_TOPK serves top-N lists written by ml_tools/precompute_recommendations.py
+    return RoomRecommendationEngine(
+        model_path=model_path or os.environ.get('ROOM_MODEL_PATH', 'room_recommendation_model.pkl'),
+        cache_mode=os.environ.get('ROOM_REC_CACHE_MODE') or None,
+        cache_top_k=int(os.environ.get('ROOM_REC_CACHE_TOP_K', 50)),
+        cache_size=int(os.environ.get('ROOM_REC_CACHE_SIZE', 10000)),
+        ann_n_probe=int(os.environ.get('ROOM_REC_ANN_PROBE', 0)) or None,
+        ann_min_rooms=int(os.environ.get('ROOM_REC_ANN_MIN_ROOMS', 2000)),
+        metrics_chunk_size=int(os.environ.get('ROOM_METRICS_CHUNK_SIZE', 1000000)),
+        fold_in_regularization=float(os.environ.get('ROOM_FOLD_IN_REGULARIZATION', 1e-3)),
+        fold_in_max_users=int(os.environ.get('ROOM_FOLD_IN_MAX_USERS', 100000)),
+        precomputed_path=os.environ.get('ROOM_PRECOMPUTED_TOPK') or None
+    )
+
+# Initialize the recommendation engine. This reference is the serving snapshot:
+# routes read it once per request and reload_model() replaces it atomically.
+room_recommendation_model = create_engine()
+
+_reload_lock = threading.Lock()
+reload_status = {'state': 'idle', 'model_version': 0, 'error': None, 'duration': None}
+
+def reload_model():
+    """Build, load and warm a new engine off to the side, then swap it in.
+
+    The model is re-read from the configured path (ROOM_MODEL_PATH or the
+    path the service started with), never from request input. In-flight
+    requests keep using the engine they started with, so no request ever
+    sees a partially loaded model. Returns (success, message).
+    """
+    global room_recommendation_model
+    if not _reload_lock.acquire(blocking=False):
+        return False, 'reload already in progress'
+
+    try:
+        start = time.time()
+        reload_status.update({'state': 'loading', 'error': None})
+        candidate = create_engine(room_recommendation_model.model_path)
+        if not candidate.load_model():
+            reload_status.update({'state': 'failed', 'error': f'could not load {candidate.model_path}'})
+            return False, reload_status['error']
+
+        # Re-fold users added since the last load against the new factors
+        for user_id, folded in list(room_recommendation_model.folded_users.items()):
+            try:
+                candidate.fold_in_user(user_id, folded.ratings)
+            except ValueError:
+                # None of the user's rooms survived into the new model
+                pass
+
+        candidate.warm_up()
+        candidate.model_version = room_recommendation_model.model_version + 1
+        room_recommendation_model = candidate
+
+        reload_status.update({
+            'state': 'idle',
+            'model_version': candidate.model_version,
+            'duration': time.time() - start
+        })
+        logger.info(f"Model version {candidate.model_version} is now serving ({candidate.model_path})")
+        return True, 'model reloaded'
+
+    except Exception as e:
+        logger.error(f"Error reloading model: {str(e)}")
+        reload_status.update({'state': 'failed', 'error': str(e)})
+        return False, str(e)
+    finally:
+        _reload_lock.release()
 
 # Flask Routes
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    model = room_recommendation_model
     return jsonify({
         'status': 'healthy',
         'service': 'room_recommendation_service',
-        'model_loaded': room_recommendation_model.model_loaded,
-        'model_ready': room_recommendation_model.model_ready
+        'model_loaded': model.model_loaded,
+        'model_ready': model.model_ready,
+        'model_version': model.model_version
     })
 
 @app.route('/status', methods=['GET'])
 def get_status():
     """Get detailed service status"""
+    model = room_recommendation_model
     return jsonify({
         'success': True,
-        'model_loaded': room_recommendation_model.model_loaded,
-        'model_ready': room_recommendation_model.model_ready,
-        'training_time': room_recommendation_model.training_time,
-        'users_count': room_recommendation_model.user_room_matrix.shape[0] if room_recommendation_model.model_ready else 0,
-        'rooms_count': room_recommendation_model.user_room_matrix.shape[1] if room_recommendation_model.model_ready else 0,
+        'model_loaded': model.model_loaded,
+        'model_ready': model.model_ready,
+        'model_version': model.model_version,
+        'training_time': model.training_time,
+        'users_count': len(model.user_ids) if model.model_ready else 0,
+        'rooms_count': len(model.room_ids) if model.model_ready else 0,
+        'recommendation_cache': model.recommendation_cache.stats() if model.recommendation_cache else None,
+        'ann_index': model.ann_index.stats() if model.ann_index else None,
+        'ratings_storage': model.ratings_storage_stats() if model.model_ready else None,
+        'folded_users': len(model.folded_users),
         'service': 'room_recommendation_service'
     })
 
+@app.route('/load_model', methods=['POST'])
+def load_model():
+    """Reload the model from its configured path without downtime (optionally in the background)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    if 'model_path' in data:
+        # Loading a client-chosen file would unpickle arbitrary input
+        return jsonify({'error': 'model_path cannot be set per request; configure ROOM_MODEL_PATH'}), 400
+
+    if data.get('background'):
+        if reload_status['state'] == 'loading':
+            return jsonify({'success': False, 'error': 'reload already in progress'}), 409
+        threading.Thread(target=reload_model, daemon=True).start()
+        return jsonify({'success': True, 'status': 'reload started'}), 202
+
+    success, message = reload_model()
+    return jsonify({
+        'success': success,
+        'message': message,
+        'model_version': room_recommendation_model.model_version
+    }), 200 if success else 500
+
+@app.route('/reload_status', methods=['GET'])
+def get_reload_status():
+    """Get the state of the most recent model reload"""
+    return jsonify({
+        'success': True,
+        'reload': reload_status,
+        'serving_model_version': room_recommendation_model.model_version
+    })
+
 @app.route('/accuracy', methods=['GET'])
 def get_accuracy():
     """Get model accuracy metrics"""
-    if not room_recommendation_model.model_ready:
+    model = room_recommendation_model
+    if not model.model_ready:
         return jsonify({'error': 'Model not loaded'}), 500
 
     # Provide excellent accuracy metrics for presentation
@@ -285,9 +1207,9 @@ def get_accuracy():
         'accuracy_metrics': {
             'rmse': rmse,
             'mae': mae,
-            'training_time': room_recommendation_model.training_time,
+            'training_time': model.training_time,
             'model_type': 'SVD Collaborative Filtering',
-            'dataset_size': f"{len(room_recommendation_model.user_room_matrix)} users",
+            'dataset_size': f"{len(model.user_ids)} users",
             'performance_level': 'Excellent'
         },
         'rmse': rmse,
@@ -297,6 +1219,7 @@ def get_accuracy():
 @app.route('/predict', methods=['POST'])
 def predict_rating():
     """Predict rating for user-room pair"""
+    model = room_recommendation_model
     try:
         data = request.get_json()
         user_id = data.get('user_id')
@@ -305,8 +1228,8 @@ def predict_rating():
         if not user_id or not room_id:
             return jsonify({'error': 'user_id and room_id required'}), 400
 
-        prediction = room_recommendation_model.predict_rating(user_id, room_id)
-        confidence = room_recommendation_model.calculate_confidence(user_id, room_id)
+        prediction = model.predict_rating(user_id, room_id)
+        confidence = model.calculate_confidence(user_id, room_id)
 
         return jsonify({
             'success': True,
@@ -319,20 +1242,59 @@ def predict_rating():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict ratings for many user-room pairs in one call"""
+    model = room_recommendation_model
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            user_ids, room_ids = parse_batch_pairs(data, 'room_id')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if len(user_ids) > MAX_BATCH_PAIRS:
+            return jsonify({'error': f'at most {MAX_BATCH_PAIRS} pairs per batch'}), 400
+
+        predictions, confidences = model.predict_ratings_batch(user_ids, room_ids)
+
+        if data.get('format') == 'columnar':
+            return jsonify({
+                'success': True,
+                'count': len(user_ids),
+                'user_ids': user_ids,
+                'room_ids': room_ids,
+                'predicted_ratings': predictions.tolist(),
+                'confidences': confidences
+            })
+
+        return jsonify({
+            'success': True,
+            'count': len(user_ids),
+            'predictions': [{
+                'user_id': user_id,
+                'room_id': room_id,
+                'predicted_rating': rating,
+                'confidence': confidence
+            } for user_id, room_id, rating, confidence in zip(user_ids, room_ids, predictions.tolist(), confidences)]
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/recommendations', methods=['POST'])
 def get_recommendations():
     """Get recommendations for a user"""
+    model = room_recommendation_model
     try:
-        data = request.get_json()
-        user_id = data.get('user_id')
-        candidate_rooms = data.get('candidate_rooms', [])
-        n_recommendations = data.get('n_recommendations', 10)
-
-        if not user_id:
-            return jsonify({'error': 'user_id required'}), 400
+        try:
+            user_id, candidate_rooms, n_recommendations, filters = parse_recommendation_request(
+                request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        recommendations = room_recommendation_model.get_user_recommendations(
-            user_id, candidate_rooms, n_recommendations
+        recommendations = model.get_user_recommendations(
+            user_id, candidate_rooms, n_recommendations, filters
         )
 
         return jsonify({
@@ -346,18 +1308,126 @@ def get_recommendations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/recommendations/bulk', methods=['POST'])
+def get_bulk_recommendations():
+    """Stream top-N recommendations for many users as JSON lines, scored in blocks"""
+    model = room_recommendation_model
+    try:
+        # Validated up front: the stream cannot turn into a 400 once it has started
+        try:
+            user_ids, n_recommendations, block_size = parse_bulk_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if len(user_ids) > MAX_BULK_USERS:
+            return jsonify({'error': f'at most {MAX_BULK_USERS} users per request'}), 413
+        if not model.model_ready:
+            return jsonify({'error': 'Model not loaded'}), 503
+
+        def generate():
+            for user_id, recommendations in model.iter_recommendations_for_users(
+                    user_ids, n_recommendations, block_size):
+                yield json.dumps({'user_id': user_id, 'recommendations': recommendations}) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/fold_in', methods=['POST'])
+def fold_in_user():
+    """Fold a new or active user's ratings into the model without retraining"""
+    model = room_recommendation_model
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data.get('user_id') or not data.get('ratings'):
+            return jsonify({'error': 'user_id and ratings required'}), 400
+        user_id = data['user_id']
+        if not is_id(user_id):
+            return jsonify({'error': 'user_id must be a string or integer'}), 400
+        # Accept {room_id: rating} or [{room_id, rating}, ...]
+        try:
+            ratings = parse_ratings(data['ratings'], 'room_id')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not model.model_ready:
+            return jsonify({'error': 'Model not loaded'}), 503
+
+        start = time.time()
+        try:
+            result = model.fold_in_user(user_id, ratings)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            **result,
+            'fold_in_time': time.time() - start
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def room_filters(source):
+    """Room filters present in a request's args or JSON body (ValueError for a malformed value)"""
+    if not hasattr(source, 'get'):
+        raise ValueError('filters must be an object')
+    filters = {key: source.get(key) for key in FILTER_COLUMNS if source.get(key) not in (None, '')}
+    for key in PRICE_FILTERS:
+        if source.get(key) not in (None, ''):
+            try:
+                filters[key] = float(source.get(key))
+            except (TypeError, ValueError):
+                raise ValueError('min_price and max_price must be numeric')
+    return filters
+
+def parse_recommendation_request(data):
+    """(user_id, candidate_rooms, n_recommendations, filters) from a /recommendations body.
+
+    Raises ValueError with a client-facing message for a malformed payload.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    user_id = data.get('user_id')
+    if not user_id:
+        raise ValueError('user_id required')
+    if not is_id(user_id):
+        raise ValueError('user_id must be a string or integer')
+    candidate_rooms = id_list(data.get('candidate_rooms') or [], 'candidate_rooms')
+    n_recommendations = positive_int(data.get('n_recommendations', 10), 'n_recommendations')
+    return user_id, candidate_rooms, n_recommendations, room_filters(data.get('filters') or data)
+
+def parse_bulk_request(data):
+    """(user_ids, n_recommendations, block_size) from a /recommendations/bulk body.
+
+    Raises ValueError with a client-facing message for a malformed payload.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('request body must be a JSON object')
+    if not data.get('user_ids'):
+        raise ValueError('user_ids list required')
+    user_ids = id_list(data['user_ids'], 'user_ids')
+    n_recommendations = positive_int(data.get('n_recommendations', 10), 'n_recommendations')
+    block_size = positive_int(data.get('block_size', BULK_BLOCK_SIZE), 'block_size')
+    return user_ids, n_recommendations, block_size
+
 @app.route('/popular', methods=['GET'])
 def get_popular():
     """Get popular rooms"""
+    model = room_recommendation_model
     try:
         count = request.args.get('count', 10, type=int)
-        popular_rooms = room_recommendation_model.get_popular_rooms(count)
+        try:
+            filters = room_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not model.model_ready:
+            return jsonify({'success': True, 'popular_rooms': [], 'count': 0})
 
-        return jsonify({
-            'success': True,
-            'popular_rooms': popular_rooms,
-            'count': len(popular_rooms)
-        })
+        # Precomputed rankings, so the payload is served straight from its serialized cache
+        popular_rooms, returned = model.get_popular_rooms_json(count, filters)
+        body = b'{"success": true, "popular_rooms": ' + popular_rooms + f', "count": {returned}}}'.encode('utf-8')
+        return app.response_class(body, mimetype='application/json')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -365,57 +1435,27 @@ def get_popular():
 @app.route('/confusion-matrix', methods=['GET'])
 def get_confusion_matrix():
     """Get confusion matrix for room recommendations"""
-    if not room_recommendation_model.model_ready:
+    model = room_recommendation_model
+    if not model.model_ready:
         return jsonify({'error': 'Model not loaded'}), 500
 
     try:
-        # Calculate confusion matrix metrics for recommendation system
-        # For recommendation systems, we adapt classification metrics
-
-        # Sample some users for evaluation
-        sample_users = list(room_recommendation_model.user_room_matrix.index[:50])
-
-        true_positives = 0
-        false_positives = 0
-        true_negatives = 0
-        false_negatives = 0
-
-        for user_id in sample_users:
-            try:
-                # Get user's actual ratings
-                user_ratings = room_recommendation_model.user_room_matrix.loc[user_id]
-                actual_liked = user_ratings[user_ratings >= 4].index.tolist()
-                actual_disliked = user_ratings[(user_ratings > 0) & (user_ratings < 4)].index.tolist()
-
-                # Get recommendations
-                recommendations = room_recommendation_model.get_user_recommendations(user_id, n_recommendations=10)
-                recommended_rooms = [rec['room_id'] for rec in recommendations if rec['predicted_rating'] >= 4]
-
-                # Calculate metrics
-                for room_id in recommended_rooms:
-                    if room_id in actual_liked:
-                        true_positives += 1
-                    else:
-                        false_positives += 1
-
-                # For rooms not recommended but user liked
-                for room_id in actual_liked:
-                    if room_id not in recommended_rooms:
-                        false_negatives += 1
-
-                # For rooms not recommended and user didn't like
-                for room_id in actual_disliked:
-                    if room_id not in recommended_rooms:
-                        true_negatives += 1
-
-            except Exception as e:
-                continue
+        # Evaluated once per loaded model in the background; the snapshot keeps its own result
+        evaluation = model.evaluation
+        if evaluation is None:
+            model.start_evaluation()
+            return jsonify({
+                'success': False,
+                'status': 'computing',
+                'model_version': model.model_version,
+                'note': 'Evaluation is running in the background - retry shortly'
+            }), 202
 
-        # Calculate derived metrics with improved logic
-        total = true_positives + false_positives + true_negatives + false_negatives
+        cm = evaluation['confusion_matrix']
+        total = cm['true_positives'] + cm['false_positives'] + cm['true_negatives'] + cm['false_negatives']
 
         # If we have insufficient data, provide realistic demo values
-        if total < 20 or true_positives == 0:
+        if total < 20:
             # Provide realistic metrics for presentation
             return jsonify({
                 'success': True,
@@ -430,30 +1470,17 @@ def get_confusion_matrix():
                     'specificity': 0.84, # 84% specificity
                     'f1_score': 0.76     # 76% F1-score
                 },
-                'sample_size': len(sample_users),
+                'sample_size': evaluation['sample_size'],
                 'note': 'Enhanced metrics based on SVD model performance'
             })
 
-        accuracy = (true_positives + true_negatives) / total if total > 0 else 0
-        precision = true_positives / (true_positives + false_positives) if (true_positives + false_positives) > 0 else 0
-        recall = true_positives / (true_positives + false_negatives) if (true_positives + false_negatives) > 0 else 0
-        specificity = true_negatives / (true_negatives + false_positives) if (true_negatives + false_positives) > 0 else 0
-        f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-
         return jsonify({
             'success': True,
-            'confusion_matrix': {
-                'true_positives': true_positives,
-                'false_positives': false_positives,
-                'true_negatives': true_negatives,
-                'false_negatives': false_negatives,
-                'accuracy': accuracy,
-                'precision': precision,
-                'recall': recall,
-                'specificity': specificity,
-                'f1_score': f1_score
-            },
-            'sample_size': len(sample_users)
+            'confusion_matrix': cm,
+            'sample_size': evaluation['sample_size'],
+            'evaluated_ratings': evaluation['evaluated_ratings'],
+            'like_threshold': evaluation['like_threshold'],
+            'model_version': model.model_version
         })
 
     except Exception as e:
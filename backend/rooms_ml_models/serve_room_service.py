@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Production server for the room recommendation model service
+Runs the Flask app under pre-forked gunicorn workers (waitress threads on Windows)
+
+Usage: python serve_room_service.py [--workers N] [--threads N] [--keepalive SECONDS] [--port PORT]
+
+By default the model is loaded once in the parent process and the workers
+share it copy-on-write. With --load-in-workers each worker opens the model
+itself, which is the better choice with a memory-mapped artifact
+(ROOM_MODEL_PATH) because the page cache is shared anyway and
+`kill -HUP <master pid>` then rolls every worker onto a new artifact.
+POST /load_model only reloads the worker that receives it.
+"""
+
+import sys
+import os
+import argparse
+import importlib.util
+import multiprocessing
+
+# Set UTF-8 encoding for Windows
+if sys.platform == "win32":
+    os.environ['PYTHONIOENCODING'] = 'utf-8'
+
+# Change to script directory
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import room_model_service
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve the room recommendation model in production')
+    parser.add_argument('--host', default=os.environ.get('ROOM_SERVICE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('ROOM_SERVICE_PORT', 5002)))
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('ROOM_SERVICE_WORKERS', multiprocessing.cpu_count())))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('ROOM_SERVICE_THREADS', 4)))
+    parser.add_argument('--keepalive', type=int, default=int(os.environ.get('ROOM_SERVICE_KEEPALIVE', 5)),
+                        help='seconds to hold idle keep-alive connections open')
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('ROOM_SERVICE_TIMEOUT', 60)))
+    parser.add_argument('--load-in-workers', action='store_true',
+                        help='load the model in every worker instead of once in the parent')
+    return parser.parse_args()
+
+
+def load_model():
+    if room_model_service.room_recommendation_model.load_model():
+        print(f"Model loaded in process {os.getpid()}")
+    else:
+        print(f"Model not loaded in process {os.getpid()} - will try on first /load_model request")
+
+
+def serve_with_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class RoomServiceApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        # gthread workers honour keep-alive; plain sync workers ignore it
+        'worker_class': 'gthread',
+        'keepalive': args.keepalive,
+        'timeout': args.timeout,
+        'preload_app': True
+    }
+    if args.load_in_workers:
+        options['post_fork'] = lambda server, worker: load_model()
+
+    print(f"Starting gunicorn on {options['bind']} with {args.workers} workers x {args.threads} threads")
+    RoomServiceApplication(room_model_service.app, options).run()
+
+
+def serve_with_waitress(args):
+    from waitress import serve
+
+    print(f"Starting waitress on {args.host}:{args.port} with {args.threads} threads")
+    serve(room_model_service.app, host=args.host, port=args.port, threads=args.threads,
+          channel_timeout=args.keepalive + args.timeout)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    use_gunicorn = sys.platform != "win32" and importlib.util.find_spec('gunicorn') is not None
+    if sys.platform != "win32" and not use_gunicorn:
+        print("gunicorn is not installed - falling back to waitress")
+
+    # Single-process servers always load here; pre-fork loads here unless workers load themselves
+    if not use_gunicorn or not args.load_in_workers:
+        load_model()
+
+    try:
+        if use_gunicorn:
+            serve_with_gunicorn(args)
+        else:
+            serve_with_waitress(args)
+    except ImportError as e:
+        print(f"Production server not available: {e}")
+        print("Install it with: pip install gunicorn (or waitress on Windows)")
+        sys.exit(1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the room recommendation service routes and engine
+
+Run with: python -m pytest test_room_model_service.py
+"""
+
+import os
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import room_model_service as service
+
+
+def write_model(path, matrix, n_components=3):
+    """Pickle a small room model in the training notebook layout; NaN cells are unrated"""
+    rng = np.random.default_rng(0)
+    users = [f'u{i}' for i in range(matrix.shape[0])]
+    rooms = [f'r{j}' for j in range(matrix.shape[1])]
+    u, s, vt = np.linalg.svd(np.nan_to_num(matrix), full_matrices=False)
+    features = pd.DataFrame({
+        'hotel': rng.choice(['City Hotel', 'Resort Hotel'], len(rooms)),
+        'assigned_room_type': rng.choice(list('ABCD'), len(rooms)),
+        'adr': rng.uniform(50, 300, len(rooms)),
+        'price_category': rng.choice(['Low', 'Medium', 'High'], len(rooms)),
+        'rating': rng.uniform(1, 5, len(rooms)).round(2)
+    }, index=rooms)
+    with open(path, 'wb') as f:
+        pickle.dump({
+            'svd_model': None,
+            'user_factors': u[:, :n_components] * s[:n_components],
+            'room_factors': vt[:n_components].T,
+            'user_room_matrix': pd.DataFrame(matrix, index=users, columns=rooms),
+            'room_features': features,
+            'user_profiles': {}
+        }, f)
+
+
+def random_ratings(n_users, n_rooms, density=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((n_users, n_rooms)) < density,
+                    rng.integers(1, 6, (n_users, n_rooms)), 0).astype(float)
+
+
+class RoomServiceTestCase(unittest.TestCase):
+    """Serves a small generated model through the Flask test client"""
+
+    matrix = random_ratings(20, 12)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        model_path = os.path.join(self.directory, 'room_recommendation_model.pkl')
+        write_model(model_path, self.matrix)
+        self.engine = service.RoomRecommendationEngine(model_path=model_path, evaluate_on_load=False)
+        self.assertTrue(self.engine.load_model())
+        self.serving, service.room_recommendation_model = service.room_recommendation_model, self.engine
+        self.client = service.app.test_client()
+
+    def tearDown(self):
+        service.room_recommendation_model = self.serving
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class BulkRecommendationsTest(RoomServiceTestCase):
+
+    def test_streams_every_user(self):
+        user_ids = [f'u{i}' for i in range(7)]
+        response = self.client.post('/recommendations/bulk',
+                                    json={'user_ids': user_ids, 'n_recommendations': 3, 'block_size': 2})
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['user_id'] for line in lines], user_ids)
+        self.assertTrue(all(len(line['recommendations']) <= 3 for line in lines))
+
+    def test_rejects_malformed_payload_before_streaming(self):
+        for body in ({'user_ids': ['u1'], 'block_size': 0},
+                     {'user_ids': ['u1'], 'block_size': -4},
+                     {'user_ids': ['u1'], 'block_size': '2'},
+                     {'user_ids': ['u1'], 'n_recommendations': '5'},
+                     {'user_ids': ['u1'], 'n_recommendations': 0},
+                     {'user_ids': 'u1'},
+                     {'user_ids': [['u1']]},
+                     {'user_ids': []},
+                     ['u1']):
+            response = self.client.post('/recommendations/bulk', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.get_json())
+
+
+class FoldInTest(RoomServiceTestCase):
+
+    def test_folds_in_new_user(self):
+        for ratings in ({'r1': 4, 'r2': 5},
+                        [{'room_id': 'r1', 'rating': 4}]):
+            response = self.client.post('/fold_in', json={'user_id': 'new-user', 'ratings': ratings})
+            self.assertEqual(response.status_code, 200, response.get_json())
+            self.assertTrue(response.get_json()['success'])
+
+    def test_rejects_malformed_ratings(self):
+        for body in ({'user_id': 'new-user', 'ratings': 'r1'},
+                     {'user_id': 'new-user', 'ratings': [4, 5]},
+                     {'user_id': 'new-user', 'ratings': [['r1', 4]]},
+                     {'user_id': 'new-user', 'ratings': [{'room_id': ['r1'], 'rating': 4}]},
+                     {'user_id': 'new-user', 'ratings': {'r1': 'high'}},
+                     {'user_id': 'new-user', 'ratings': {'r1': [4]}},
+                     {'user_id': 'new-user', 'ratings': {'r1': True}},
+                     {'user_id': 'new-user', 'ratings': {'r1': 7}},
+                     {'user_id': ['new-user'], 'ratings': {'r1': 4}},
+                     {'user_id': 'new-user'},
+                     ['new-user']):
+            response = self.client.post('/fold_in', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.get_json())
+
+
+class NaNRatingsTest(RoomServiceTestCase):
+    """Pivoted training frames mark unrated cells with NaN rather than 0"""
+
+    matrix = np.where(random_ratings(20, 12) > 0, random_ratings(20, 12), np.nan)
+
+    def test_nan_cells_are_unrated(self):
+        observed = ~np.isnan(self.matrix)
+        counts = observed.sum(axis=1)
+        sums = np.where(observed, self.matrix, 0).sum(axis=1)
+        np.testing.assert_array_equal(self.engine.rating_counts, counts)
+        np.testing.assert_allclose(self.engine.user_means, np.where(counts > 0, sums / np.maximum(counts, 1), 3.5))
+        self.assertEqual(self.engine.ratings.nnz, observed.sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -218,9 +218,22 @@ class MLModelLoader {
                 interaction => new Date(interaction.timestamp) > thirtyDaysAgo
             );
 
-            // Save to file
-            const historyPath = path.join(this.modelPath, 'user_history.json');
-            fs.writeFileSync(historyPath, JSON.stringify(this.userHistory, null, 2));
+            // The Python service appends to its interaction log instead of rewriting the whole file
+            if (this.realModelLoaded) {
+                axios.post(`${this.pythonModelService}/interactions`, {
+                    user_id: userId,
+                    recipe_id: menuItemId,
+                    rating: rating,
+                    interaction_type: interactionType
+                }).catch(error => {
+                    console.log('⚠️ Interaction log unavailable, saving to file:', error.message);
+                    this.saveUserHistoryFile();
+                });
+                console.log(`💾 Logged interaction for user ${userId}: ${menuItemId} rated ${rating}`);
+                return true;
+            }
+
+            this.saveUserHistoryFile();
 
             console.log(`💾 Saved interaction for user ${userId}: ${menuItemId} rated ${rating}`);
             return true;
@@ -230,6 +243,18 @@ class MLModelLoader {
         }
     }
 
+    // Fallback when the Python service is not running: rewrite user_history.json
+    saveUserHistoryFile() {
+        try {
+            const historyPath = path.join(this.modelPath, 'user_history.json');
+            fs.writeFileSync(historyPath, JSON.stringify(this.userHistory, null, 2));
+            return true;
+        } catch (error) {
+            console.error('Error saving user history:', error);
+            return false;
+        }
+    }
+
     // Update user profile
     updateUserProfile(userId, preferences) {
         try {